@@ -0,0 +1,59 @@
+"""Microbenchmark guarding the per-call overhead of the @log() decorator.
+Run it after touching davinci.utils.logging:
+
+.. code-block:: bash
+
+    python -m davinci.dev_tools.log_benchmark
+
+It exits non-zero if a disabled decorator adds more than the budget
+to each call of a trivial function.
+"""
+
+import sys
+import timeit
+import logging
+
+from davinci.utils.logging import log, logger
+
+_DISABLED_BUDGET_NS = 500
+
+
+def _per_call_ns(func, number):
+    return min(timeit.repeat(lambda: func(1), number=number, repeat=5)) / number * 1e9
+
+
+def run_log_benchmark(number: int=200000) -> dict:
+    """
+    Time a trivial function bare and under @log() in each mode.
+
+    :param number: Calls per timing run.
+    :type number: int
+    :return: dict of mode -> overhead per call in nanoseconds
+    :rtype: dict
+    """
+    def plain(x):
+        return x
+
+    baseline = _per_call_ns(plain, number)
+    results = {'disabled': _per_call_ns(log(use=False)(plain), number) - baseline}
+
+    level, propagate, handlers = logger.level, logger.propagate, logger.handlers
+    try:
+        logger.setLevel(logging.WARNING)
+        results['enabled, filtered by level'] = _per_call_ns(log(use=True)(plain), number) - baseline
+        logger.setLevel(logging.DEBUG)
+        logger.propagate, logger.handlers = False, [logging.NullHandler()]
+        results['enabled, emitting'] = _per_call_ns(log(use=True)(plain), number // 10) - baseline
+    finally:
+        logger.setLevel(level)
+        logger.propagate, logger.handlers = propagate, handlers
+    return results
+
+
+if __name__ == '__main__':
+    results = run_log_benchmark()
+    for mode, overhead in results.items():
+        print(f'{mode:<28} {overhead:>10.0f} ns/call')
+    if results['disabled'] > _DISABLED_BUDGET_NS:
+        print(f'Disabled @log() overhead is over the {_DISABLED_BUDGET_NS} ns budget.')
+        sys.exit(1)
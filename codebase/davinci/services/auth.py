@@ -1,18 +1,56 @@
 import os
+import json
 import time
+import atexit
+import hashlib
+import tempfile
+import threading
 #import pyodbc
 import boto3
 import requests
+from botocore.config import Config
 from contextlib import contextmanager
 from dotenv import load_dotenv
-from functools import lru_cache
 
 from davinci.utils.logging import log, logger
+from davinci.utils.tracing import traced
 from davinci.utils.utils import _parse_doppler_list
 from davinci.utils.global_config import SYSTEM, DOPPLER_KEY
 
 load_dotenv()
 
+_S3_CLIENT_CONFIG = {
+    'max_pool_connections': 50,
+    'max_attempts': 5,
+    'retry_mode': 'standard',
+}
+_S3_CLIENT = {'client': None}
+_S3_CLIENT_LOCK = threading.Lock()
+
+_DYNAMIC_SECRETS_TTL_SEC = 1800
+_DOPPLER_TIMEOUT = (3.05, 15)
+_DOPPLER_MAX_ATTEMPTS = 5
+_SNAPSHOT_MARGIN_SEC = 120
+"""
+A snapshot is only trusted if its dynamic secrets have at least
+this long left before they expire.
+"""
+_SNAPSHOT_PATH = os.environ.get(
+    'DAVINCI_SECRETS_SNAPSHOT',
+    os.path.join(os.path.expanduser('~'), '.cache', 'davinci', 'secrets.snapshot'),
+)
+_REFRESH_MARGIN_SEC = 300
+"""
+Dynamic secrets are refreshed this long before they expire.
+"""
+_SECRET_AUDIT = {
+    'enabled': True,
+    'interval_sec': 60,
+    'next_flush': 0.0,
+    'counts': {},
+}
+_SECRET_AUDIT_LOCK = threading.Lock()
+
 def _build_doppler_http_connect(token):
     """
     Builds an https string pointed to doppler with auth in header.
@@ -22,7 +60,8 @@ def _build_doppler_http_connect(token):
     :return: https_string, header_dict
     :rtype: str, dict
     """
-    url = "https://api.doppler.com/v3/configs/config/secrets/download?format=json&include_dynamic_secrets=true&dynamic_secrets_ttl_sec=1800"
+    url = ("https://api.doppler.com/v3/configs/config/secrets/download?format=json"
+        f"&include_dynamic_secrets=true&dynamic_secrets_ttl_sec={_DYNAMIC_SECRETS_TTL_SEC}")
     headers = {
         "accept": "application/json",
         "authorization": f"Bearer {token}"
@@ -47,36 +86,226 @@ def _get_doppler_token():
     return token
 
 
-@lru_cache()
-def _get_all_doppler_secrets():
+def _fetch_doppler_secrets(token):
     """
-    Fetch and cache dictionary of all Doppler secrets.
-    LRU cache is used here to minimize number of requests to Doppler.
-    So if get_secret("MY_SECRET", doppler=True) is called at any point
-    in a job, this function will only be called one time, then reference
-    the cache for subsequent calls.
+    Download all secrets from Doppler. Retries with exponential
+    backoff, but only after a failed attempt.
 
+    :param token: doppler token
+    :type token: str
     :return: secrets dict
     :rtype: dict
     """
-    # Fetch token from auth.py file
-    token = _get_doppler_token()
-
-    # Loop and exponential backoff for reliability against network issues
-    response = False
-    reconnect_counter = 0
     url, headers = _build_doppler_http_connect(token)
-    while not response and reconnect_counter < 5:
+    for attempt in range(1, _DOPPLER_MAX_ATTEMPTS + 1):
         try:
-            response = requests.get(url, headers=headers).json()
-        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout) as e:
+            r = requests.get(url, headers=headers, timeout=_DOPPLER_TIMEOUT)
+            r.raise_for_status()
+            response = r.json()
+            if response:
+                return response
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.warning("Issue with Doppler connection... retrying.")
             logger.info(str(e))
-        reconnect_counter += 1
-        time.sleep(2 ** reconnect_counter)
-    if not response:
-        raise ValueError("Could not connect to Doppler.")
-    return response
+        if attempt < _DOPPLER_MAX_ATTEMPTS:
+            time.sleep(2 ** attempt)
+    raise ValueError("Could not connect to Doppler.")
+
+def _snapshot_box(token):
+    """SecretBox keyed on the Doppler token, so only token holders can read the snapshot."""
+    import nacl.secret
+    return nacl.secret.SecretBox(hashlib.sha256(token.encode('utf-8')).digest())
+
+def _read_secrets_snapshot(token):
+    """
+    Load the encrypted secrets snapshot if it exists and its dynamic
+    secrets are not about to expire.
+
+    :return: (secrets dict, fetched_at epoch seconds) or None
+    """
+    try:
+        with open(_SNAPSHOT_PATH, 'rb') as f:
+            snapshot = json.loads(_snapshot_box(token).decrypt(f.read()))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.info(f'Ignoring unreadable secrets snapshot: {e}')
+        return None
+    if time.time() - snapshot['fetched_at'] > _DYNAMIC_SECRETS_TTL_SEC - _SNAPSHOT_MARGIN_SEC:
+        return None
+    return snapshot['secrets'], snapshot['fetched_at']
+
+def _write_secrets_snapshot(token, secrets, fetched_at):
+    """Atomically write the encrypted secrets snapshot, readable only by this user."""
+    try:
+        folder = os.path.dirname(_SNAPSHOT_PATH)
+        os.makedirs(folder, exist_ok=True)
+        body = _snapshot_box(token).encrypt(json.dumps({'fetched_at': fetched_at, 'secrets': secrets}).encode('utf-8'))
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, _SNAPSHOT_PATH)
+    except Exception as e:
+        logger.info(f'Could not write secrets snapshot: {e}')
+
+class SecretsManager:
+    """
+    Holds the Doppler secrets payload and keeps it fresh. The payload
+    is loaded on first use (from the encrypted snapshot when possible),
+    then a daemon thread refreshes it ahead of the dynamic secrets TTL.
+    Each refresh swaps in a new dict atomically, and change callbacks
+    fire only for the keys whose values actually changed.
+
+    :param ttl_sec: Lifetime of dynamic secrets in the payload.
+    :type ttl_sec: int
+    :param refresh_margin_sec: Refresh this long before expiry.
+    :type refresh_margin_sec: int
+
+    Example usage:
+
+    .. code-block:: python
+
+        from davinci.services.auth import secrets_manager
+
+        # Rebuild a client only when its credentials rotate
+        secrets_manager.on_change(['SQL_USER', 'SQL_PASSWORD'], lambda changed: engine.dispose())
+
+    """
+    def __init__(self, ttl_sec: int=_DYNAMIC_SECRETS_TTL_SEC, refresh_margin_sec: int=_REFRESH_MARGIN_SEC):
+        self.ttl_sec = ttl_sec
+        self.refresh_margin_sec = refresh_margin_sec
+        self.fetched_at = 0.0
+        self._payload = None
+        self._parsed = None
+        self._token = None
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._thread = None
+
+    @property
+    def expires_at(self) -> float:
+        """Epoch seconds at which the current dynamic secrets expire."""
+        return self.fetched_at + self.ttl_sec
+
+    def get_all(self) -> dict:
+        """
+        The current secrets payload. Blocks only if there is neither
+        an in-process payload nor a usable snapshot.
+
+        :return: secrets dict
+        :rtype: dict
+        """
+        payload = self._payload
+        if payload is not None:
+            return payload
+        with self._lock:
+            if self._payload is None:
+                # Fetch token from auth.py file
+                self._token = _get_doppler_token()
+                snapshot = _read_secrets_snapshot(self._token)
+                if snapshot is None:
+                    self._swap(_fetch_doppler_secrets(self._token), time.time(), persist=True)
+                else:
+                    self._swap(*snapshot, persist=False)
+                # A snapshot is within its TTL, so the refresh thread only
+                # fetches again once it nears expiry, like a fresh payload.
+                self._start()
+        return self._payload
+
+    def get(self, key: str):
+        """
+        A single secret, already split on semicolons. This is a plain
+        dict lookup once the payload is loaded.
+
+        :param key: Secret name.
+        :type key: str
+        :return: str or list[str]
+        """
+        parsed = self._parsed
+        if parsed is None:
+            self.get_all()
+            parsed = self._parsed
+        value = parsed[key]
+        return list(value) if isinstance(value, list) else value
+
+    def refresh(self) -> dict:
+        """
+        Fetch secrets from Doppler now and swap them in.
+
+        :return: secrets dict
+        :rtype: dict
+        """
+        if self._token is None:
+            self._token = _get_doppler_token()
+        self._swap(_fetch_doppler_secrets(self._token), time.time(), persist=True)
+        return self._payload
+
+    def on_change(self, keys, callback):
+        """
+        Register callback(changed_keys) to run after a refresh that
+        changes any of keys. Callbacks run on the refresh thread.
+
+        :param keys: Secret names to watch.
+        :type keys: List[str]
+        :param callback: Called with the set of changed watched keys.
+        :type callback: Callable
+        """
+        self._callbacks.append((frozenset(keys), callback))
+
+    def _swap(self, payload, fetched_at, persist):
+        old = self._payload
+        # Parse before publishing, so readers never see a payload without it.
+        self._parsed = {k: _parse_doppler_list(v) if isinstance(v, str) else v for k, v in payload.items()}
+        self._payload, self.fetched_at = payload, fetched_at
+        if persist:
+            _write_secrets_snapshot(self._token, payload, fetched_at)
+        if old is None:
+            return
+        changed = {k for k in set(old) | set(payload) if old.get(k) != payload.get(k)}
+        for keys, callback in list(self._callbacks):
+            hit = keys & changed
+            if hit:
+                try:
+                    callback(hit)
+                except Exception as e:
+                    logger.warning(f'Secrets change callback failed: {e}')
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='davinci-doppler-refresh', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        backoff = 5
+        while True:
+            wait = self.expires_at - self.refresh_margin_sec - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                self.refresh()
+                backoff = 5
+            except Exception as e:
+                logger.warning(f'Background Doppler refresh failed; keeping current secrets. {e}')
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 120)
+
+secrets_manager = SecretsManager()
+"""
+The process-wide SecretsManager behind get_secret(..., doppler=True).
+"""
+
+def _get_all_doppler_secrets():
+    """
+    Fetch and cache dictionary of all Doppler secrets.
+    Secrets are cached in-process by secrets_manager, so Doppler is
+    only hit at startup (or not at all, with a fresh snapshot) and
+    then in the background shortly before dynamic secrets expire.
+
+    :return: secrets dict
+    :rtype: dict
+    """
+    return secrets_manager.get_all()
 
 def _get_doppler_secret(key: str):
     """
@@ -92,11 +321,85 @@ def _get_doppler_secret(key: str):
     :return: secret
     :rtype: str or list[str]
     """
-    secrets = _get_all_doppler_secrets()
-    res = _parse_doppler_list(secrets[key])
+    return secrets_manager.get(key)
+
+def configure_secret_audit(enabled: bool=True, interval_sec: float=60):
+    """
+    Configure the secret access audit log. Instead of one log line per
+    get_secret call, access counts per key are batched and logged at
+    most once every interval_sec, and once more at process exit.
+    Values are never logged.
+
+    :param enabled: Collect and log access counts.
+    :type enabled: bool
+    :param interval_sec: Seconds between audit log lines.
+    :type interval_sec: float
+    """
+    _SECRET_AUDIT['enabled'] = enabled
+    _SECRET_AUDIT['interval_sec'] = interval_sec
+
+def _audit_secret_access(keys):
+    with _SECRET_AUDIT_LOCK:
+        counts = _SECRET_AUDIT['counts']
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+    if time.monotonic() >= _SECRET_AUDIT['next_flush']:
+        _flush_secret_audit()
+
+@atexit.register
+def _flush_secret_audit():
+    with _SECRET_AUDIT_LOCK:
+        counts = _SECRET_AUDIT['counts']
+        _SECRET_AUDIT['counts'] = {}
+        _SECRET_AUDIT['next_flush'] = time.monotonic() + _SECRET_AUDIT['interval_sec']
+    if counts:
+        summary = ', '.join(f'{k} x{n}' for k, n in sorted(counts.items()))
+        logger.info(f'Secrets accessed: {summary}')
+
+def _get_env_secret(key, prod):
+    load_dotenv()
+    if prod:
+        return os.environ.get(key)
+    try:
+        from davinci.dev_tools.auth import SECRETS
+        return SECRETS[key]
+    except ImportError as e:
+        logger.error(f'Could not access env var: {key}. Please check the DaVinci pip package.')
+        raise e
+
+@traced('auth.get_secrets')
+def get_secrets(keys, prod=SYSTEM, doppler=True) -> dict:
+    """
+    Look up several secrets at once. See get_secret.
+
+    :param keys: .env keys to get values for.
+    :type keys: Iterable[str]
+    :param prod: production boolean
+    :type prod: bool
+    :param doppler: use doppler boolean
+    :type doppler: bool
+    :return: dict of key -> str or list[str]
+    :rtype: dict
+
+    Example usage:
+
+    .. code-block:: python
+
+        from davinci.services.auth import get_secrets
+
+        creds = get_secrets(['SQL_USER', 'SQL_PASSWORD', 'SQL_SERVER'])
+
+    """
+    keys = list(keys)
+    if doppler:
+        res = {key: secrets_manager.get(key) for key in keys}
+    else:
+        res = {key: _get_env_secret(key, prod) for key in keys}
+    if _SECRET_AUDIT['enabled']:
+        _audit_secret_access(keys)
     return res
 
-@log()
+@traced('auth.get_secret', capture=('key',))
 def get_secret(key, prod=SYSTEM, doppler=True):
     """
     This secret-getter varies depending on prod/dev environment.
@@ -110,6 +413,11 @@ def get_secret(key, prod=SYSTEM, doppler=True):
         int if needed. This is different than the normal
         handling from a .env file.
 
+    .. note::
+        This is called on hot paths (per connection, per client), so it
+        is not wrapped in @log(). Lookups are served from memory and
+        audited in batches; see configure_secret_audit.
+
     :param key: .env key to get value for.
     :type key: str
     :param prod: production boolean
@@ -118,21 +426,12 @@ def get_secret(key, prod=SYSTEM, doppler=True):
     :type doppler: bool
     :return: str or list[str]
     """
-
     if doppler:
-        return _get_doppler_secret(key)
-    print(f"doppler:{doppler}")
-    load_dotenv()
-    if prod:
-        res = os.environ.get(key)
+        res = secrets_manager.get(key)
     else:
-        try:
-            print("HERE")
-            from davinci.dev_tools.auth import SECRETS
-            res = SECRETS[key]  
-        except ImportError as e:
-            logger.error(f'Could not access env var: {key}. Please check the DaVinci pip package.')
-            raise e
+        res = _get_env_secret(key, prod)
+    if _SECRET_AUDIT['enabled']:
+        _audit_secret_access((key,))
     return res
 
 @contextmanager
@@ -160,15 +459,18 @@ def open_sql_connection(db: str='FINAL_SQL_DATABASE') -> None:
             # Connection closed
             
     """    
+    # Imported here so the module still loads where pyodbc is not installed
+    import pyodbc
     try:
         # creating a connection string
+        creds = get_secrets(['SQL_SERVER', db, 'SQL_USER', 'SQL_PASSWORD'])
         conn = pyodbc.connect(
             driver='{ODBC Driver 17 for SQL Server}',
-            server=get_secret('SQL_SERVER'),
-            database=get_secret(db),
+            server=creds['SQL_SERVER'],
+            database=creds[db],
             trusted_conn='no',
-            uid=get_secret('SQL_USER'),
-            pwd=get_secret('SQL_PASSWORD'),
+            uid=creds['SQL_USER'],
+            pwd=creds['SQL_PASSWORD'],
         )
         yield conn
     except Exception as err:
@@ -181,22 +483,70 @@ def open_sql_connection(db: str='FINAL_SQL_DATABASE') -> None:
     finally:
         conn.close() if conn else None
 
-@log()
+def configure_s3_client(max_pool_connections: int=50, max_attempts: int=5, retry_mode: str='standard'):
+    """
+    Set the connection pool size and retry policy for the shared
+    S3 client. The next get_s3_client() call builds a new client.
+
+    :param max_pool_connections: Max concurrent HTTP connections. Raise
+        this when downloading with many threads.
+    :type max_pool_connections: int
+    :param max_attempts: Total attempts per request, including the first.
+    :type max_attempts: int
+    :param retry_mode: botocore retry mode: 'legacy', 'standard' or 'adaptive'.
+    :type retry_mode: str
+    """
+    with _S3_CLIENT_LOCK:
+        _S3_CLIENT_CONFIG.update(
+            max_pool_connections=max_pool_connections,
+            max_attempts=max_attempts,
+            retry_mode=retry_mode,
+        )
+        _S3_CLIENT['client'] = None
+
+def reset_s3_client():
+    """Drop the shared S3 client so the next call rebuilds it."""
+    with _S3_CLIENT_LOCK:
+        _S3_CLIENT['client'] = None
+
 def get_s3_client():
     """
-    Returns a boto3.client for s3 interaction.
+    Returns the process-wide boto3.client for s3 interaction.
+    The client is built once and shared across threads, so
+    repeated calls don't pay for secrets lookup or client setup.
+    See configure_s3_client() for pool size and retries.
 
     :return: boto3.client
     """
-    boto3_login = {
-            "verify": False,
-            "service_name": 's3',
-            "region_name": 'us-east-2',
-            "aws_access_key_id": get_secret("AWS_ACCESS_KEY_ID"),
-            "aws_secret_access_key": get_secret("AWS_SECRET_ACCESS_KEY")
-        }
-    s3 = boto3.client(**boto3_login)
-    return s3
+    client = _S3_CLIENT['client']
+    if client is not None:
+        return client
+    with _S3_CLIENT_LOCK:
+        if _S3_CLIENT['client'] is None:
+            config = Config(
+                max_pool_connections=_S3_CLIENT_CONFIG['max_pool_connections'],
+                retries={
+                    'max_attempts': _S3_CLIENT_CONFIG['max_attempts'],
+                    'mode': _S3_CLIENT_CONFIG['retry_mode'],
+                },
+            )
+            boto3_login = {
+                    "verify": False,
+                    "service_name": 's3',
+                    "region_name": 'us-east-2',
+                    "aws_access_key_id": get_secret("AWS_ACCESS_KEY_ID"),
+                    "aws_secret_access_key": get_secret("AWS_SECRET_ACCESS_KEY"),
+                    "config": config,
+                }
+            # Sessions are not thread-safe, so each build gets its own.
+            _S3_CLIENT['client'] = boto3.session.Session().client(**boto3_login)
+        return _S3_CLIENT['client']
+
+def _on_s3_credentials_change(changed):
+    logger.info(f'S3 credentials rotated ({sorted(changed)}); rebuilding client.')
+    reset_s3_client()
+
+secrets_manager.on_change(["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"], _on_s3_credentials_change)
 
 @log()
 def get_cognito_client():
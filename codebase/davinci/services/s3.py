@@ -1,16 +1,111 @@
 import os
-from typing import Union
+import io
+import gzip
+import math
+import shutil
+import hashlib
+import operator
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from urllib.parse import quote, unquote
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+from typing import Union, Dict, Iterable, Iterator, Tuple, Callable
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
 from docx import Document
 from pptx import Presentation
 from typing import List
 from io import StringIO, BytesIO
 from davinci.services.auth import get_s3_client, get_secret
+from davinci.services.s3_cache import get_s3_cache
 from davinci.utils.logging import log, logger
+from davinci.utils.tracing import traced, submit_in_context, map_in_context
 from davinci.utils.df_engines import _get_engine, _get_read_func, _get_save_func, _VALID_ENGINE_TYPE
 from davinci.utils.fileio import force_folder_to_path
 
-@log()
+
+_MB = 1024 ** 2
+_SPOOL_MAX_SIZE = 64 * _MB
+"""
+DataFrames serialized for upload stay in memory up to this size,
+then spill to an anonymous temp file that is removed on close.
+"""
+_TRANSFER_PROFILES = {
+    'default': {'part_size': 16 * _MB, 'max_concurrency': 10, 'memory_cap': 256 * _MB},
+    'large': {'part_size': 64 * _MB, 'max_concurrency': 32, 'memory_cap': 2048 * _MB},
+    'low_memory': {'part_size': 8 * _MB, 'max_concurrency': 4, 'memory_cap': 64 * _MB},
+}
+"""
+Transfer profiles for get_file/upload_file. part_size is the minimum
+multipart chunk size (it grows with the object so uploads stay under
+S3's 10,000 part limit), and concurrency is lowered as needed so that
+part_size * max_concurrency stays within memory_cap.
+"""
+_MAX_PARTS = 9000
+
+def _transfer_config(size: Union[None, int], profile: Union[str, dict]='default') -> TransferConfig:
+    """Build a TransferConfig for an object of the given size from a profile."""
+    settings = _TRANSFER_PROFILES[profile] if isinstance(profile, str) else profile
+    part_size = settings['part_size']
+    if size:
+        part_size = max(part_size, math.ceil(size / _MAX_PARTS / _MB) * _MB)
+    concurrency = max(1, min(settings['max_concurrency'], settings['memory_cap'] // part_size))
+    return TransferConfig(
+        multipart_threshold=part_size,
+        multipart_chunksize=part_size,
+        max_concurrency=concurrency,
+        use_threads=True,
+    )
+
+class _TransferProgress:
+    """
+    Thread-safe boto3 transfer callback that tracks bytes moved,
+    forwards progress to an optional user callback, and logs
+    throughput once the transfer is done.
+    """
+    def __init__(self, direction: str, key: str, size: Union[None, int], callback: Union[None, Callable]=None):
+        self.direction = direction
+        self.key = key
+        self.size = size
+        self.callback = callback
+        self.bytes_done = 0
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount: int):
+        with self._lock:
+            self.bytes_done += bytes_amount
+            done = self.bytes_done
+        if self.callback is not None:
+            self.callback(done, self.size)
+
+    def finish(self) -> dict:
+        seconds = max(time.perf_counter() - self.start, 1e-9)
+        stats = {
+            'direction': self.direction,
+            'key': self.key,
+            'bytes': self.bytes_done,
+            'seconds': round(seconds, 3),
+            'mb_per_sec': round(self.bytes_done / _MB / seconds, 2),
+        }
+        logger.info(f'S3 {self.direction} complete: {stats}')
+        return stats
+
+@lru_cache()
+def _get_bucket_name():
+    """The Kenco SCS bucket name, resolved once per process."""
+    return get_secret('AWS_BUCKET_NAME')
+
+@log(per_minute=30)
+@traced('s3.file_exists', capture=('path',))
 def file_exists(path: str) -> bool:
     """
     Check if an S3 file exists.
@@ -27,20 +122,79 @@ def file_exists(path: str) -> bool:
             if file_exists('prod/project/file.txt'):
                 print('success')
     """
-    s3 = get_s3_client()
-    bucket = get_secret('AWS_BUCKET_NAME')
+    return _head_exists(path)
+
+def _head_exists(path: str) -> bool:
+    """Metadata-only existence check; no object body is transferred."""
     try:
-        s3.get_object(
-            Bucket=bucket,
-            Key=path
-        )
+        get_s3_client().head_object(Bucket=_get_bucket_name(), Key=path)
         return True
-    except s3.exceptions.NoSuchKey:
-        return False
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+
+def _iter_objects(prefix: str, delimiter: str=None) -> Iterator[dict]:
+    """Yield every object summary under a prefix, following pagination."""
+    paginator = get_s3_client().get_paginator('list_objects_v2')
+    kwargs = {'Delimiter': delimiter} if delimiter else {}
+    for page in paginator.paginate(Bucket=_get_bucket_name(), Prefix=prefix, **kwargs):
+        yield from page.get('Contents', [])
 
+def _list_keys(prefix: str, delimiter: str=None) -> set:
+    """All keys under a prefix, following pagination."""
+    return {obj['Key'] for obj in _iter_objects(prefix, delimiter)}
 
 @log()
-def get_file(s3_path: str, local_path: str, use_cache: bool=False) -> str:
+@traced('s3.files_exist')
+def files_exist(paths: Iterable[str], max_workers: int=16, use_listing: Union[None, bool]=None) -> Dict[str, bool]:
+    """
+    Check whether many S3 files exist at once. Either lists the
+    folder holding all paths (one request per 1000 keys) or issues
+    concurrent HEAD requests, whichever is likely cheaper.
+
+    :param paths: the paths to the files on s3. Do not include the
+        top level bucket name.
+    :type paths: Iterable[str]
+    :param max_workers: Concurrent HEAD requests.
+    :type max_workers: int
+    :param use_listing: Force a prefix listing (True) or HEADs (False).
+        By default, listing is used for more than 50 paths in the
+        same folder, and only that folder's own files are listed.
+    :type use_listing: bool
+    :return: dict of path -> Boolean
+
+    Example usage:
+
+        .. code-block:: python
+
+            exists = files_exist(['prod/project/a.csv', 'prod/project/b.csv'])
+            todo = [p for p, done in exists.items() if not done]
+    """
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return {}
+    folders = {p[:p.rfind('/') + 1] for p in paths}
+    # Paths spread over subfolders would list everything below their common
+    # prefix, which can be far more keys than were asked about.
+    same_folder = len(folders) == 1 and '' not in folders
+    if use_listing is None:
+        use_listing = len(paths) > 50 and same_folder
+    if use_listing:
+        if same_folder:
+            keys = _list_keys(folders.pop(), delimiter='/')
+        else:
+            prefix = os.path.commonprefix(paths)
+            keys = _list_keys(prefix[:prefix.rfind('/') + 1])
+        return {p: p in keys for p in paths}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as executor:
+        return dict(zip(paths, map_in_context(executor, _head_exists, paths)))
+
+
+@log()
+@traced('s3.get_file', capture=('s3_path',))
+def get_file(s3_path: str, local_path: str, use_cache: bool=False, profile: Union[str, dict]='default',
+        callback: Union[None, Callable]=None) -> str:
     """
     Download a file from s3 to local machine.
 
@@ -49,8 +203,16 @@ def get_file(s3_path: str, local_path: str, use_cache: bool=False) -> str:
     :type s3_path: str
     :param local_path: The local path to save the file to. Include the filename.
     :type local_path: str
-    :param use_cache: Attempt to load the file from local machine before querying S3.
+    :param use_cache: Serve the file from the local S3 cache (see
+        davinci.services.s3_cache), only downloading it when its ETag
+        has changed since it was cached.
     :type use_cache: bool
+    :param profile: Transfer profile name from _TRANSFER_PROFILES, or a
+        dict with part_size, max_concurrency and memory_cap.
+    :type profile: str or dict
+    :param callback: Optional progress callback, called with
+        (bytes_done, total_bytes) from the transfer threads.
+    :type callback: Callable
     :return: the local path argument
 
     Example usage:
@@ -59,16 +221,24 @@ def get_file(s3_path: str, local_path: str, use_cache: bool=False) -> str:
 
             s3_path('prod/project/file.txt', '/home/ubuntu/file.txt')
     """
-    bucket_name = get_secret('AWS_BUCKET_NAME')
+    bucket_name = _get_bucket_name()
     force_folder_to_path(local_path)
-    if use_cache and os.path.exists(local_path):
+    if use_cache:
+        cached = get_s3_cache().fetch(bucket_name, s3_path)
+        if not (os.path.exists(local_path) and os.path.samefile(cached, local_path)):
+            shutil.copyfile(cached, local_path)
         return local_path
     s3 = get_s3_client()
-    s3.download_file(bucket_name, s3_path, local_path)
+    size = s3.head_object(Bucket=bucket_name, Key=s3_path)['ContentLength']
+    progress = _TransferProgress('download', s3_path, size, callback)
+    s3.download_file(bucket_name, s3_path, local_path, Config=_transfer_config(size, profile), Callback=progress)
+    progress.finish()
     return local_path
 
 @log()
-def upload_file(local_path: str, s3_path: str, **kwargs) -> bool:
+@traced('s3.upload_file', capture=('s3_path',))
+def upload_file(local_path: str, s3_path: str, profile: Union[str, dict]='default',
+        callback: Union[None, Callable]=None, **kwargs) -> bool:
     """
     Upload a file to the Kenco SCS S3 bucket.
 
@@ -76,6 +246,14 @@ def upload_file(local_path: str, s3_path: str, **kwargs) -> bool:
     :type local_path: str
     :param s3_path: Full S3 path (filename should be included)
     :type s3_path: str
+    :param profile: Transfer profile name from _TRANSFER_PROFILES, or a
+        dict with part_size, max_concurrency and memory_cap.
+    :type profile: str or dict
+    :param callback: Optional progress callback, called with
+        (bytes_done, total_bytes) from the transfer threads.
+    :type callback: Callable
+    :param kwargs: kwargs passed to boto3 upload_file, e.g. ExtraArgs.
+    :type kwargs: dict
     :return: None
 
     Example usage:
@@ -85,16 +263,21 @@ def upload_file(local_path: str, s3_path: str, **kwargs) -> bool:
             upload_file('my/local/path/my_data.txt', 'my/s3/path/my_data.txt')
     """
 
-    bucket_name = get_secret('AWS_BUCKET_NAME')
+    bucket_name = _get_bucket_name()
     s3 = get_s3_client()
     try:
-        s3.upload_file(local_path, bucket_name, s3_path, **kwargs)
+        size = os.path.getsize(local_path)
+        kwargs.setdefault('Config', _transfer_config(size, profile))
+        progress = _TransferProgress('upload', s3_path, size, callback)
+        s3.upload_file(local_path, bucket_name, s3_path, Callback=progress, **kwargs)
+        progress.finish()
         return True
     except:
         logger.error(f'Error. Could not upload {local_path} to s3.')
         return False
 
-@log()
+@log(per_minute=30)
+@traced('s3.delete_file', capture=('s3_path',))
 def delete_file(s3_path: str) -> bool:
     """
     Upload a file to the Kenco SCS S3 bucket.
@@ -112,7 +295,7 @@ def delete_file(s3_path: str) -> bool:
             upload_file('my/local/path/my_data.txt', 'my/s3/path/my_data.txt')
     """
 
-    bucket_name = get_secret('AWS_BUCKET_NAME')
+    bucket_name = _get_bucket_name()
     s3 = get_s3_client()
     try:
         s3.delete_object(Bucket=bucket_name, Key=s3_path)
@@ -122,10 +305,44 @@ def delete_file(s3_path: str) -> bool:
         return False
 
 
+class _BinaryForwarder(io.RawIOBase):
+    """
+    Writable raw stream forwarding to another binary file object.
+    SpooledTemporaryFile is not an IOBase before Python 3.11, so it
+    can't be wrapped in a TextIOWrapper directly.
+    """
+    def __init__(self, target):
+        self._target = target
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        return self._target.write(b)
+
+def _write_compressed_csv(df: pd.DataFrame, buffer, compression: str):
+    """Write df as CSV into a binary buffer through a gzip or zstd stream."""
+    if compression == 'gzip':
+        stream = gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6)
+    elif compression == 'zstd':
+        import zstandard
+        stream = zstandard.ZstdCompressor().stream_writer(buffer, closefd=False)
+    else:
+        raise ValueError(f'Bad compression for upload_df(): {compression}')
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    df.to_csv(text, header=True, index=False)
+    text.flush()
+    text.detach()
+    stream.close()
+
 @log()
-def upload_df(df: pd.DataFrame, path: str, file_type: str ='csv') -> None:
+@traced('s3.upload_df', capture=('path', 'file_type'))
+def upload_df(df: pd.DataFrame, path: str, file_type: str ='csv', compression: Union[None, str]=None) -> None:
     """
-    Upload a DataFrame to the Kenco SCS S3 bucket.
+    Upload a DataFrame to the Kenco SCS S3 bucket. The frame is
+    serialized into an in-memory buffer (spilling to an anonymous temp
+    file past _SPOOL_MAX_SIZE) and streamed up with a concurrent
+    multipart upload, so nothing is left in the working directory.
 
     :param df: DataFrame to upload
     :type df: pd.DataFrame
@@ -133,6 +350,10 @@ def upload_df(df: pd.DataFrame, path: str, file_type: str ='csv') -> None:
     :type path: str
     :param file_type: Can be 'csv', 'excel', or 'parquet'
     :type file_type: str
+    :param compression: For csv only, None, 'gzip' or 'zstd' ('zstd'
+        needs the zstandard package). Read gzip back with
+        download_to_df(..., compression='gzip').
+    :type compression: str
     :return: None
 
     Example usage:
@@ -140,30 +361,41 @@ def upload_df(df: pd.DataFrame, path: str, file_type: str ='csv') -> None:
         .. code-block:: python
 
             upload_df(df, 'my/s3/path/my_data.xlsx', file_type='excel')
+            upload_df(df, 'my/s3/path/my_data.csv.gz', compression='gzip')
     """
-
-    local_file_path = os.path.basename(path)
+    if compression and file_type != 'csv':
+        raise ValueError('upload_df() only supports compression for csv')
     engine = _get_engine(file_type)
     save_func = _get_save_func(df, file_type)
-    if file_type == 'csv':
-        save_func(local_file_path, header=True, index=False)
-    elif file_type == 'excel':
-        save_func(local_file_path, header=True, index=False, engine=engine)
-    elif file_type == 'parquet':
-        save_func(local_file_path, index=False, engine=engine)
-    else:
-        raise ValueError('Bad file_type upload for upload_df()')
-    
-    upload_file(local_file_path, path)
-    os.unlink(local_file_path)
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE) as buffer:
+        if file_type == 'csv' and compression:
+            _write_compressed_csv(df, buffer, compression)
+        elif file_type == 'csv':
+            text = io.TextIOWrapper(io.BufferedWriter(_BinaryForwarder(buffer)), encoding='utf-8', newline='')
+            save_func(text, header=True, index=False)
+            text.flush()
+        elif file_type == 'excel':
+            save_func(buffer, header=True, index=False, engine=engine)
+        elif file_type == 'parquet':
+            save_func(buffer, index=False, engine=engine)
+        else:
+            raise ValueError('Bad file_type upload for upload_df()')
+        size = buffer.tell()
+        buffer.seek(0)
+        progress = _TransferProgress('upload', path, size)
+        get_s3_client().upload_fileobj(buffer, _get_bucket_name(), path, Config=_transfer_config(size),
+            Callback=progress)
+        progress.finish()
     return True
 
 @log()
-def download_to_df(path: str, file_type: str='csv', save_path: Union[None, str]=None, **kwargs) -> pd.DataFrame:
+@traced('s3.download_to_df', capture=('path', 'file_type'))
+def download_to_df(path: str, file_type: str='csv', save_path: Union[None, str]=None,
+        use_cache: bool=False, **kwargs) -> pd.DataFrame:
     """
     Download a DataFrame from the Kenco SCS S3 bucket.
-    If save_path is specified, a local cache of the
-    data will be made.
+    If save_path is specified, a local copy of the
+    original file will be made.
 
     :param path: Full S3 path (filename should be included)
     :type path: str
@@ -171,6 +403,9 @@ def download_to_df(path: str, file_type: str='csv', save_path: Union[None, str]=
     :type file_type: str
     :param save_path: Local path (filename should be included)
     :type save_path: str
+    :param use_cache: Read through the local S3 cache, only downloading
+        the object when its ETag has changed.
+    :type use_cache: bool
     :return: DataFrame
 
     Example usage:
@@ -178,67 +413,493 @@ def download_to_df(path: str, file_type: str='csv', save_path: Union[None, str]=
         .. code-block:: python
 
             df = download_to_df('my/s3/path/my_data.xlsx', file_type='excel')
+
+            # Parquet reads take columns/filters and only fetch what they need
+            df = download_to_df('my/s3/path/my_data.parquet', file_type='parquet',
+                columns=['Site', 'Units'], filters=[('Date', '>=', '2023-01-01')])
     """
     if file_type not in _VALID_ENGINE_TYPE:
         raise TypeError('Invalid file_type parsed')
     bucket_name = 'aws-scs-prod-bucket'
-    s3 = get_s3_client()
-    obj = s3.get_object(Bucket=bucket_name, Key=path)
-    data = obj['Body'].read()
+    if file_type == 'parquet' and not save_path and not use_cache and kwargs and set(kwargs) <= {'columns', 'filters'}:
+        # Only fetch the footer and the needed column chunks / row groups.
+        # Full reads stay a single GET.
+        return read_parquet(path, bucket=bucket_name, **kwargs)
 
     read_func = _get_read_func(file_type)
     engine = _get_engine(file_type)
-    df = read_func(BytesIO(data), engine=engine, **kwargs)
+    if use_cache:
+        source = get_s3_cache().fetch(bucket_name, path)
+    else:
+        obj = get_s3_client().get_object(Bucket=bucket_name, Key=path)
+        source = BytesIO(obj['Body'].read())
+    df = read_func(source, engine=engine, **kwargs)
     if save_path:
+        # Keep the original bytes rather than re-encoding the frame.
         force_folder_to_path(save_path)
-        save_func = _get_save_func(df, file_type)
-        if file_type == 'csv':
-            save_func(save_path, header=True, index=False)
-        elif file_type == 'excel':
-            save_func(save_path, header=True, index=False, engine=engine)
-        elif file_type == 'parquet':
-            save_func(save_path, index=False, engine=engine)
+        if use_cache:
+            shutil.copyfile(source, save_path)
         else:
-            raise ValueError('Bad file_type download for download_to_df()')
+            with open(save_path, 'wb') as f:
+                f.write(source.getbuffer())
     return df
 
+class _S3RangeFile(io.RawIOBase):
+    """
+    Read-only, seekable file over an S3 object. Every read is a ranged
+    GET on the shared client, so readers that seek (like Parquet) only
+    transfer the bytes they ask for.
+    """
+    def __init__(self, path: str, bucket: Union[None, str]=None):
+        self.path = path
+        self.bucket = bucket or _get_bucket_name()
+        self.size = get_s3_client().head_object(Bucket=self.bucket, Key=path)['ContentLength']
+        self.bytes_read = 0
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self._pos = max(0, min(offset, self.size))
+        return self._pos
+
+    def read(self, n=-1):
+        end = self.size if n is None or n < 0 else min(self.size, self._pos + n)
+        if end <= self._pos:
+            return b''
+        obj = get_s3_client().get_object(Bucket=self.bucket, Key=self.path, Range=f'bytes={self._pos}-{end - 1}')
+        data = obj['Body'].read()
+        self._pos += len(data)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+_FILTER_OPS = {
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+_ARROW_OPS = {
+    '=': pc.equal, '==': pc.equal, '!=': pc.not_equal,
+    '<': pc.less, '<=': pc.less_equal, '>': pc.greater, '>=': pc.greater_equal,
+}
+
+def _normalize_filters(filters):
+    """Filters as a list of AND-ed conjunctions (DNF), like pandas/pyarrow."""
+    if not filters:
+        return []
+    if isinstance(filters[0], tuple):
+        return [list(filters)]
+    return [list(conj) for conj in filters]
+
+def _stats_may_match(stats, op, value):
+    """Whether a row group with these min/max statistics can contain a match."""
+    if stats is None or not stats.has_min_max:
+        return True
+    lo, hi = stats.min, stats.max
+    try:
+        if op in ('=', '=='):
+            return lo <= value <= hi
+        if op == 'in':
+            return any(lo <= v <= hi for v in value)
+        if op in ('<', '<='):
+            return _FILTER_OPS[op](lo, value)
+        if op in ('>', '>='):
+            return _FILTER_OPS[op](hi, value)
+    except TypeError:
+        pass
+    return True
+
+def _prune_row_groups(metadata, dnf):
+    """Indexes of row groups whose statistics might satisfy the filters."""
+    keep = []
+    for i in range(metadata.num_row_groups):
+        rg = metadata.row_group(i)
+        stats = {rg.column(j).path_in_schema: rg.column(j).statistics for j in range(rg.num_columns)}
+        if not dnf or any(all(_stats_may_match(stats.get(col), op, val) for col, op, val in conj) for conj in dnf):
+            keep.append(i)
+    return keep
+
+def _filter_mask(table, dnf):
+    """Exact row mask for DNF filters on an Arrow table."""
+    mask = None
+    for conj in dnf:
+        conj_mask = None
+        for col, op, val in conj:
+            column = table.column(col)
+            if op == 'in':
+                m = pc.is_in(column, value_set=pa.array(val))
+            elif op == 'not in':
+                m = pc.invert(pc.is_in(column, value_set=pa.array(val)))
+            else:
+                m = _ARROW_OPS[op](column, pa.scalar(val, type=column.type))
+            conj_mask = m if conj_mask is None else pc.and_(conj_mask, m)
+        mask = conj_mask if mask is None else pc.or_(mask, conj_mask)
+    return mask
+
+@log()
+@traced('s3.read_parquet', capture=('path',))
+def read_parquet(path: str, columns: Union[None, List[str]]=None, filters=None,
+        bucket: Union[None, str]=None, to_pandas: bool=True) -> Union[pd.DataFrame, pa.Table]:
+    """
+    Read a Parquet file from S3 with column projection and predicate
+    filters. Only the footer and the column chunks of row groups whose
+    statistics can match the filters are fetched, using ranged GETs.
+
+    :param path: Full S3 path (filename should be included)
+    :type path: str
+    :param columns: Columns to read. Defaults to all.
+    :type columns: List[str]
+    :param filters: pyarrow/pandas-style filters, e.g.
+        [('Date', '>=', datetime(2023, 1, 1)), ('Site', 'in', ['ATL', 'MEM'])],
+        or a list of such lists to OR them.
+    :type filters: List[Tuple] or List[List[Tuple]]
+    :param bucket: Bucket to read from. Defaults to AWS_BUCKET_NAME.
+    :type bucket: str
+    :param to_pandas: Return a DataFrame (default) or the Arrow table.
+    :type to_pandas: bool
+    :return: DataFrame or pyarrow.Table
+
+    Example usage:
+
+        .. code-block:: python
+
+            df = read_parquet('prod/snapshots/inventory.parquet',
+                columns=['Site', 'SKU', 'OnHand'],
+                filters=[('SnapshotDate', '>=', datetime(2023, 6, 1))])
+    """
+    dnf = _normalize_filters(filters)
+    source = _S3RangeFile(path, bucket=bucket)
+    # pre_buffer coalesces the column chunk reads of a row group into a
+    # few large ranged GETs instead of one request per chunk.
+    pf = pq.ParquetFile(source, pre_buffer=True)
+    filter_cols = {col for conj in dnf for col, _, _ in conj}
+    read_cols = None if columns is None else list(dict.fromkeys(list(columns) + sorted(filter_cols)))
+    row_groups = _prune_row_groups(pf.metadata, dnf)
+    if row_groups:
+        table = pf.read_row_groups(row_groups, columns=read_cols)
+    else:
+        table = pf.schema_arrow.empty_table()
+        table = table.select(read_cols) if read_cols else table
+    if dnf and table.num_rows:
+        table = table.filter(_filter_mask(table, dnf))
+    if columns is not None:
+        table = table.select(list(columns))
+    logger.info(f'read_parquet {path}: {len(row_groups)}/{pf.metadata.num_row_groups} row groups, '
+        f'{source.bytes_read}/{source.size} bytes fetched.')
+    return table.to_pandas() if to_pandas else table
+
+def _format_partition_value(value) -> str:
+    """Render a partition value for a hive path segment."""
+    if isinstance(value, (datetime, pd.Timestamp)) and pd.Timestamp(value) == pd.Timestamp(value).normalize():
+        value = pd.Timestamp(value).strftime('%Y-%m-%d')
+    return quote(str(value), safe='')
+
+def _parse_partitions(key: str, prefix: str) -> Dict[str, str]:
+    """The {column: raw value} pairs in a hive-style key under prefix."""
+    parts = key[len(prefix):].strip('/').split('/')[:-1]
+    return dict(unquote(p).split('=', 1) for p in parts if '=' in p)
+
+def _coerce_like(raw: str, example):
+    """Parse a partition string to the type of a filter value."""
+    if isinstance(example, bool):
+        return raw.lower() in ('true', '1')
+    if isinstance(example, int):
+        return int(raw)
+    if isinstance(example, float):
+        return float(raw)
+    if isinstance(example, datetime):
+        return pd.Timestamp(raw).to_pydatetime()
+    if isinstance(example, date):
+        return pd.Timestamp(raw).date()
+    return raw
+
+def _partition_matches(values: Dict[str, str], dnf) -> bool:
+    """Whether a partition's values satisfy the partition-column filters."""
+    if not dnf:
+        return True
+    for conj in dnf:
+        ok = True
+        for col, op, val in conj:
+            raw = values.get(col)
+            if raw is None:
+                continue
+            try:
+                if op in ('in', 'not in'):
+                    hit = _coerce_like(raw, next(iter(val))) in val
+                    ok = hit if op == 'in' else not hit
+                else:
+                    ok = _FILTER_OPS[op](_coerce_like(raw, val), val)
+            except (ValueError, TypeError, StopIteration):
+                ok = True
+            if not ok:
+                break
+        if ok:
+            return True
+    return False
+
+def _file_filters(values: Dict[str, str], dnf):
+    """
+    The row filters left for one partition's file: only the conjunctions
+    its partition values satisfy, without their partition predicates.
+    None when one of them is all partition predicates, i.e. every row matches.
+    """
+    file_dnf = []
+    for conj in dnf:
+        if _partition_matches(values, [conj]):
+            rest = [f for f in conj if f[0] not in values]
+            if not rest:
+                return None
+            file_dnf.append(rest)
+    return file_dnf or None
+
+def _delete_keys(keys: List[str]):
+    """Delete keys in batches of 1000."""
+    s3 = get_s3_client()
+    for i in range(0, len(keys), 1000):
+        batch = [{'Key': k} for k in keys[i:i + 1000]]
+        s3.delete_objects(Bucket=_get_bucket_name(), Delete={'Objects': batch, 'Quiet': True})
+
+def _upload_parquet(df: pd.DataFrame, path: str):
+    """Serialize a frame to Parquet in memory and upload it."""
+    buffer = BytesIO()
+    df.to_parquet(buffer, index=False, engine='pyarrow')
+    buffer.seek(0)
+    get_s3_client().upload_fileobj(buffer, _get_bucket_name(), path,
+        Config=_transfer_config(buffer.getbuffer().nbytes))
+    return path
+
+@log()
+@traced('s3.upload_dataset', capture=('prefix',))
+def upload_dataset(df: pd.DataFrame, prefix: str, partition_cols: List[str], max_workers: int=8,
+        replace_partitions: bool=True) -> List[str]:
+    """
+    Upload a DataFrame as a hive-partitioned Parquet dataset, e.g.
+    prefix/Customer=GMI/Date=2023-06-01/part-<uuid>.parquet. Each
+    partition is uploaded concurrently, and only partitions present
+    in df are touched, so a daily load rewrites a single partition.
+
+    :param df: DataFrame to upload
+    :type df: pd.DataFrame
+    :param prefix: S3 folder of the dataset
+    :type prefix: str
+    :param partition_cols: Columns to partition by, outermost first.
+        These are stored in the path, not in the files.
+    :type partition_cols: List[str]
+    :param max_workers: Concurrent partition uploads.
+    :type max_workers: int
+    :param replace_partitions: Delete existing files in each partition
+        being written, after the new files are uploaded. If False,
+        new part files are added alongside.
+    :type replace_partitions: bool
+    :return: list of uploaded keys
+
+    Example usage:
+
+        .. code-block:: python
+
+            upload_dataset(df, 'prod/project/shipments', ['Customer', 'Date'])
+    """
+    prefix = prefix.rstrip('/')
+    groups = df.groupby(partition_cols, sort=False, dropna=False)
+    jobs = []
+    for values, part in groups:
+        values = values if isinstance(values, tuple) else (values,)
+        folder = prefix + '/' + '/'.join(
+            f'{quote(str(c), safe="")}={_format_partition_value(v)}' for c, v in zip(partition_cols, values))
+        jobs.append((folder, part.drop(columns=partition_cols)))
+
+    # Snapshot the existing files first, and only delete them once every
+    # new part is uploaded, so a failed upload never empties a partition.
+    stale = [k for folder, _ in jobs for k in _list_keys(folder + '/')] if replace_partitions else []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs) or 1))) as executor:
+        futures = [submit_in_context(executor, _upload_parquet, part, f'{folder}/part-{uuid.uuid4().hex}.parquet')
+            for folder, part in jobs]
+        uploaded = [f.result() for f in futures]
+
+    new_keys = set(uploaded)
+    _delete_keys([k for k in stale if k not in new_keys])
+    return uploaded
+
+@log()
+@traced('s3.download_dataset', capture=('prefix',))
+def download_dataset(prefix: str, columns: Union[None, List[str]]=None, filters=None,
+        max_workers: int=8) -> pd.DataFrame:
+    """
+    Read a hive-partitioned Parquet dataset written by upload_dataset.
+    Filters on partition columns prune whole partitions before anything
+    is downloaded; the rest are pushed down to each file's row groups
+    (see read_parquet). Files are read concurrently. Partition columns
+    come back as strings, as they are stored in the path.
+
+    :param prefix: S3 folder of the dataset
+    :type prefix: str
+    :param columns: Columns to return, partition columns included. Defaults to all.
+    :type columns: List[str]
+    :param filters: pyarrow/pandas-style filters, e.g.
+        [('Customer', '=', 'GMI'), ('Date', '>=', date(2023, 6, 1))].
+    :type filters: List[Tuple] or List[List[Tuple]]
+    :param max_workers: Concurrent file reads.
+    :type max_workers: int
+    :return: DataFrame
+
+    Example usage:
+
+        .. code-block:: python
+
+            df = download_dataset('prod/project/shipments',
+                columns=['Customer', 'Date', 'Units'],
+                filters=[('Customer', '=', 'GMI'), ('Date', '>=', date(2023, 6, 1))])
+    """
+    prefix = prefix.rstrip('/') + '/'
+    dnf = _normalize_filters(filters)
+    files = []
+    for obj in _iter_objects(prefix):
+        if obj['Key'].endswith('.parquet'):
+            values = _parse_partitions(obj['Key'], prefix)
+            if _partition_matches(values, dnf):
+                files.append((obj['Key'], values, _file_filters(values, dnf)))
+    if not files:
+        return pd.DataFrame(columns=columns)
+
+    partition_cols = set(files[0][1])
+    file_cols = None if columns is None else [c for c in columns if c not in partition_cols]
+
+    def _read(item):
+        key, values, file_dnf = item
+        part = read_parquet(key, columns=file_cols, filters=file_dnf)
+        for col, raw in values.items():
+            if columns is None or col in columns:
+                part[col] = raw
+        return part
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files)))) as executor:
+        parts = list(map_in_context(executor, _read, files))
+    df = pd.concat(parts, ignore_index=True)
+    return df[columns] if columns is not None else df
+
+_TEXT_EXTENSIONS = ('.txt', '.docx', '.pptx')
+
+def _parse_document(s3_path: str, file_content: bytes) -> str:
+    """Extract text from .txt/.docx/.pptx bytes. Module-level so it pickles."""
+    if s3_path.endswith(".txt"):
+        return file_content.decode('utf-8')
+    elif s3_path.endswith(".docx"):
+        doc = Document(BytesIO(file_content))
+        return "\n".join([par.text for par in doc.paragraphs])
+    elif s3_path.endswith(".pptx"):
+        prs = Presentation(BytesIO(file_content))
+        text = ""
+        for slide in prs.slides:
+            for shape in slide.shapes:
+                if hasattr(shape, "text"):
+                    text += shape.text
+        return text
+
+class _LazyProcessPool:
+    """ProcessPoolExecutor that is only started on the first submit."""
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool.submit(fn, *args)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+def _fetch_and_parse(s3_path: str, processes) -> Tuple[str, str]:
+    """Download one object and parse it, using the process pool for docx/pptx."""
+    obj = get_s3_client().get_object(Bucket=_get_bucket_name(), Key=s3_path)
+    file_content = obj['Body'].read()
+    if processes is None or s3_path.endswith(".txt"):
+        return s3_path, _parse_document(s3_path, file_content)
+    return s3_path, processes.submit(_parse_document, s3_path, file_content).result()
+
+def _iter_folder_texts(s3_folder_path: str, max_workers: int, max_processes: int) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (key, text) for supported files under a folder as they complete.
+    At most 2 * max_workers downloads are in flight at once, so memory
+    stays flat regardless of folder size.
+    """
+    keys = (obj['Key'] for obj in _iter_objects(s3_folder_path) if obj['Key'].endswith(_TEXT_EXTENSIONS))
+    processes = _LazyProcessPool(max_processes) if max_processes else None
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as threads:
+            in_flight = set()
+            for key in keys:
+                in_flight.add(submit_in_context(threads, _fetch_and_parse, key, processes))
+                if len(in_flight) >= 2 * max_workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in wait(in_flight).done:
+                yield future.result()
+    finally:
+        if processes is not None:
+            processes.shutdown()
+
 @log()
-def read_s3_files_in_folder(s3_folder_path: str) -> List[str]:
+@traced('s3.read_s3_files_in_folder', capture=('s3_folder_path',))
+def read_s3_files_in_folder(s3_folder_path: str, max_workers: int=16, max_processes: int=0,
+        stream: bool=False) -> Union[List[str], Iterator[Tuple[str, str]]]:
     """
     Read the content of all files in a folder from S3 based on their types.
+    Objects are downloaded concurrently on a thread pool. .docx/.pptx
+    files can optionally be parsed on a process pool.
 
     :param s3_folder_path: the path to the folder on S3.
     :type s3_folder_path: str
-    :return: a list of file contents as strings.
-    """
-    bucket_name = get_secret('AWS_BUCKET_NAME')
-    s3 = get_s3_client()
-    objects = s3.list_objects_v2(Bucket=bucket_name, Prefix=s3_folder_path)
+    :param max_workers: Concurrent downloads.
+    :type max_workers: int
+    :param max_processes: Processes for docx/pptx parsing. Defaults to
+        0, parsing in the download threads, which works everywhere
+        (process pools are unavailable on Lambda). The pool is only
+        started once the first docx/pptx file is found.
+    :type max_processes: int
+    :param stream: If True, return a generator of (key, text) tuples in
+        completion order instead of a list.
+    :type stream: bool
+    :return: a list of file contents as strings, in listing order,
+        or a generator of (key, text) when stream=True.
 
-    file_contents = []
-    
-    for obj in objects.get('Contents', []):
-        s3_path = obj['Key']
-        obj = s3.get_object(Bucket=bucket_name, Key=s3_path)
-        file_content = obj['Body'].read()
-
-        if s3_path.endswith(".txt"):
-            file_contents.append(file_content.decode('utf-8'))
-        elif s3_path.endswith(".docx"):
-            doc = Document(BytesIO(file_content))
-            file_contents.append("\n".join([par.text for par in doc.paragraphs]))
-        elif s3_path.endswith(".pptx"):
-            prs = Presentation(BytesIO(file_content))
-            text = ""
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text += shape.text
-            file_contents.append(text)
+    Example usage:
 
-    return file_contents
+        .. code-block:: python
+
+            for key, text in read_s3_files_in_folder('prod/docs/', stream=True):
+                index(key, text)
+    """
+    texts = _iter_folder_texts(s3_folder_path, max(1, max_workers), max_processes)
+    if stream:
+        return texts
+    # S3 lists keys in lexicographic order, so sorting restores listing order
+    results = dict(texts)
+    return [results[key] for key in sorted(results)]
 
 @log()
+@traced('s3.get_file_names_in_folder', capture=('s3_folder_path',))
 def get_file_names_in_folder(s3_folder_path:str) -> List[str]:
     """
     Read the content of all files in a folder from S3 based on their types.
@@ -247,16 +908,164 @@ def get_file_names_in_folder(s3_folder_path:str) -> List[str]:
     :type s3_folder_path: str
     :return: a list of file names as strings.
     """
-    bucket_name = get_secret('AWS_BUCKET_NAME')
-    s3 = get_s3_client()
-    objects = s3.list_objects_v2(Bucket=bucket_name, Prefix=s3_folder_path)
-
     file_contents = []
-    for obj in objects.get('Contents', []):
+    for obj in _iter_objects(s3_folder_path):
         file_contents.append(os.path.basename(obj['Key']).split('/')[-1])
     
     return file_contents
 
 
- 
+def _md5_parts(local_path: str, part_size: int) -> Tuple[bytes, int]:
+    """Concatenated MD5 digests of each part_size chunk of a file, and the part count."""
+    digests = []
+    with open(local_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(part_size), b''):
+            digests.append(hashlib.md5(chunk).digest())
+    return b''.join(digests), len(digests)
+
+def _etag_matches(local_path: str, etag: str, size: int) -> bool:
+    """
+    Compare a local file to an S3 ETag. Single-part ETags are the MD5;
+    multipart ETags are the MD5 of the part MD5s plus '-<parts>', so
+    the likely part sizes are tried.
+    """
+    etag = etag.strip('"')
+    if '-' not in etag:
+        with open(local_path, 'rb') as f:
+            digest = hashlib.md5()
+            for chunk in iter(lambda: f.read(8 * _MB), b''):
+                digest.update(chunk)
+        return digest.hexdigest() == etag
+    n_parts = int(etag.split('-')[1])
+    candidates = {8 * _MB, 16 * _MB, 64 * _MB, math.ceil(size / n_parts / _MB) * _MB}
+    for part_size in sorted(candidates):
+        if math.ceil(size / part_size) != n_parts:
+            continue
+        digests, _ = _md5_parts(local_path, part_size)
+        if f'{hashlib.md5(digests).hexdigest()}-{n_parts}' == etag:
+            return True
+    return False
+
+def _local_files(local_dir: str) -> Dict[str, str]:
+    """{relative posix path: absolute path} for every file under local_dir."""
+    files = {}
+    for root, _, names in os.walk(local_dir):
+        for name in names:
+            full = os.path.join(root, name)
+            files[os.path.relpath(full, local_dir).replace(os.sep, '/')] = full
+    return files
+
+def _sync_report(direction: str, transferred: List[int], skipped: List[int], deleted: int) -> Dict[str, int]:
+    report = {
+        'transferred': len(transferred),
+        'skipped': len(skipped),
+        'deleted': deleted,
+        'bytes_transferred': sum(transferred),
+        'bytes_saved': sum(skipped),
+    }
+    logger.info(f'sync {direction}: {report}')
+    return report
+
+@log()
+@traced('s3.sync', capture=('prefix',))
+def sync(local_dir: str, prefix: str, delete: bool=False, max_workers: int=8) -> Dict[str, int]:
+    """
+    Upload a local folder to an S3 prefix, transferring only files
+    that are new or whose size/checksum differs from the S3 ETag.
+
+    :param local_dir: Local folder to upload.
+    :type local_dir: str
+    :param prefix: S3 folder to sync into.
+    :type prefix: str
+    :param delete: Delete S3 objects under prefix with no local counterpart.
+    :type delete: bool
+    :param max_workers: Concurrent uploads.
+    :type max_workers: int
+    :return: dict with transferred/skipped/deleted counts, bytes_transferred and bytes_saved
+
+    Example usage:
+
+        .. code-block:: python
+
+            sync('artifacts/model_v3', 'prod/project/models/model_v3')
+    """
+    prefix = prefix.rstrip('/') + '/'
+    remote = {obj['Key'][len(prefix):]: obj for obj in _iter_objects(prefix)}
+    local = _local_files(local_dir)
+
+    def _needs_upload(rel):
+        size = os.path.getsize(local[rel])
+        obj = remote.get(rel)
+        changed = obj is None or obj['Size'] != size or not _etag_matches(local[rel], obj['ETag'], size)
+        return rel, size, changed
+
+    transferred, skipped = [], []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        to_upload = []
+        for rel, size, changed in map_in_context(executor, _needs_upload, local):
+            if changed:
+                to_upload.append((rel, size))
+            else:
+                skipped.append(size)
+        uploads = {submit_in_context(executor, upload_file, local[rel], prefix + rel): size
+            for rel, size in to_upload}
+        for future, size in uploads.items():
+            if not future.result():
+                raise IOError('sync could not upload every file; see log for details.')
+            transferred.append(size)
+
+    deleted = [prefix + rel for rel in remote if rel not in local] if delete else []
+    _delete_keys(deleted)
+    return _sync_report('up', transferred, skipped, len(deleted))
+
+@log()
+@traced('s3.sync_down', capture=('prefix',))
+def sync_down(prefix: str, local_dir: str, delete: bool=False, max_workers: int=8) -> Dict[str, int]:
+    """
+    Download an S3 prefix to a local folder, transferring only objects
+    that are missing locally or whose size/checksum differs.
+
+    :param prefix: S3 folder to download.
+    :type prefix: str
+    :param local_dir: Local folder to sync into.
+    :type local_dir: str
+    :param delete: Delete local files with no counterpart under prefix.
+    :type delete: bool
+    :param max_workers: Concurrent downloads.
+    :type max_workers: int
+    :return: dict with transferred/skipped/deleted counts, bytes_transferred and bytes_saved
+
+    Example usage:
+
+        .. code-block:: python
+
+            sync_down('prod/project/models/model_v3', '/opt/ml/model')
+    """
+    prefix = prefix.rstrip('/') + '/'
+    remote = {obj['Key'][len(prefix):]: obj for obj in _iter_objects(prefix) if not obj['Key'].endswith('/')}
+    local = _local_files(local_dir) if os.path.isdir(local_dir) else {}
+
+    def _needs_download(rel):
+        obj = remote[rel]
+        path = local.get(rel)
+        changed = path is None or os.path.getsize(path) != obj['Size'] or not _etag_matches(path, obj['ETag'], obj['Size'])
+        return rel, changed
+
+    transferred, skipped = [], []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        to_download = []
+        for rel, changed in map_in_context(executor, _needs_download, remote):
+            if changed:
+                to_download.append(rel)
+            else:
+                skipped.append(remote[rel]['Size'])
+        downloads = [submit_in_context(executor, get_file, prefix + rel, os.path.join(local_dir, *rel.split('/')))
+            for rel in to_download]
+        for future, rel in zip(downloads, to_download):
+            future.result()
+            transferred.append(remote[rel]['Size'])
 
+    deleted = [path for rel, path in local.items() if rel not in remote] if delete else []
+    for path in deleted:
+        os.remove(path)
+    return _sync_report('down', transferred, skipped, len(deleted))
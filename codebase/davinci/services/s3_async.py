@@ -0,0 +1,259 @@
+"""Asyncio counterparts of the davinci.services.s3 helpers, for async
+request handlers (e.g. FastAPI) that must not block the event loop.
+All calls share one aiobotocore client per event loop, and a semaphore
+caps how many S3 requests are in flight at once.
+
+Requires the aiobotocore package. Clients are rebuilt after the AWS
+credentials rotate in Doppler.
+
+Example usage:
+
+.. code-block:: python
+
+    import asyncio
+    from davinci.services import s3_async
+
+    @app.get("/forecast/{site}")
+    async def forecast(site: str):
+        df = await s3_async.download_to_df(f'prod/forecast/{site}.parquet', file_type='parquet')
+        return df.to_dict(orient='records')
+
+    # Fan out many reads without threads
+    frames = await asyncio.gather(*[s3_async.download_to_df(p) for p in paths])
+
+"""
+
+import asyncio
+from io import BytesIO
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+from davinci.services.auth import get_secret, secrets_manager
+from davinci.services.s3 import _get_bucket_name
+from davinci.utils.logging import logger
+from davinci.utils.df_engines import _get_engine, _get_read_func, _get_save_func, _VALID_ENGINE_TYPE
+
+_CONFIG = {
+    'max_concurrency': 32,
+}
+_STATE = {}
+
+
+def configure(max_concurrency: int=32):
+    """
+    Set the max number of concurrent S3 requests per event loop.
+    Takes effect for loops that have not made a request yet.
+
+    :param max_concurrency: Max in-flight requests, also used as
+        the client's connection pool size.
+    :type max_concurrency: int
+    """
+    _CONFIG['max_concurrency'] = max_concurrency
+
+
+async def _run_sync(func, *args):
+    """Run blocking work (secrets, parsing) on the default executor."""
+    return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+
+def _on_s3_credentials_change(changed):
+    """
+    Mark every loop's client stale. Runs on the secrets refresh thread,
+    so the clients are replaced by their own loop on the next request.
+    """
+    logger.info(f'S3 credentials rotated ({sorted(changed)}); rebuilding async clients.')
+    for state in list(_STATE.values()):
+        state['stale'] = True
+
+secrets_manager.on_change(["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"], _on_s3_credentials_change)
+
+
+async def _close_when_idle(state):
+    """Close a replaced client once its in-flight requests finish."""
+    for _ in range(state['slots']):
+        await state['semaphore'].acquire()
+    await state['context'].__aexit__(None, None, None)
+
+
+async def _get_state() -> dict:
+    """The shared client, semaphore and bucket for the running loop."""
+    loop = asyncio.get_event_loop()
+    state = _STATE.get(loop)
+    if state is not None and state['stale']:
+        del _STATE[loop]
+        asyncio.ensure_future(_close_when_idle(state))
+        state = None
+    if state is None:
+        # Drop clients of loops that were closed without close(), e.g. by
+        # asyncio.run in scripts and tests, so they are not kept alive.
+        # Their connections can no longer be closed cleanly, only collected.
+        for closed in [l for l in _STATE if l.is_closed()]:
+            del _STATE[closed]
+        try:
+            from aiobotocore.config import AioConfig
+            from aiobotocore.session import get_session
+        except ImportError:
+            raise ImportError("aiobotocore is required for davinci.services.s3_async.")
+        access_key, secret_key, bucket = await _run_sync(
+            lambda: (get_secret("AWS_ACCESS_KEY_ID"), get_secret("AWS_SECRET_ACCESS_KEY"), _get_bucket_name()))
+        context = get_session().create_client(
+            's3',
+            region_name='us-east-2',
+            verify=False,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=AioConfig(max_pool_connections=_CONFIG['max_concurrency']),
+        )
+        client = await context.__aenter__()
+        current = _STATE.get(loop)
+        if current is not None and not current['stale']:
+            # Another coroutine on this loop finished building first.
+            await context.__aexit__(None, None, None)
+            return current
+        if current is not None:
+            asyncio.ensure_future(_close_when_idle(current))
+        state = _STATE[loop] = {
+            'context': context,
+            'client': client,
+            'semaphore': asyncio.Semaphore(_CONFIG['max_concurrency']),
+            'slots': _CONFIG['max_concurrency'],
+            'bucket': bucket,
+            'stale': False,
+        }
+    return state
+
+
+async def close():
+    """
+    Close the shared client for the running loop, e.g. on app shutdown
+    or at the end of the coroutine passed to asyncio.run.
+    """
+    state = _STATE.pop(asyncio.get_event_loop(), None)
+    if state is not None:
+        await state['context'].__aexit__(None, None, None)
+
+
+async def get_object(path: str, bucket: str=None) -> bytes:
+    """
+    Read an S3 object's bytes.
+
+    :param path: the path to the file on s3. Do not include the
+        top level bucket name.
+    :type path: str
+    :param bucket: Bucket to read from. Defaults to AWS_BUCKET_NAME.
+    :type bucket: str
+    :return: bytes
+    """
+    state = await _get_state()
+    async with state['semaphore']:
+        obj = await state['client'].get_object(Bucket=bucket or state['bucket'], Key=path)
+        async with obj['Body'] as body:
+            return await body.read()
+
+
+async def file_exists(path: str) -> bool:
+    """
+    Check if an S3 file exists with a metadata-only HEAD request.
+
+    :param path: the path to the file on s3.
+    :type path: str
+    :return: Boolean
+    """
+    from botocore.exceptions import ClientError
+    state = await _get_state()
+    async with state['semaphore']:
+        try:
+            await state['client'].head_object(Bucket=state['bucket'], Key=path)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+
+async def files_exist(paths: Iterable[str]) -> Dict[str, bool]:
+    """
+    Check many S3 files concurrently.
+
+    :param paths: the paths to the files on s3.
+    :type paths: Iterable[str]
+    :return: dict of path -> Boolean
+    """
+    paths = list(dict.fromkeys(paths))
+    results = await asyncio.gather(*[file_exists(p) for p in paths])
+    return dict(zip(paths, results))
+
+
+async def list_keys(prefix: str) -> List[str]:
+    """
+    List every key under a prefix, following pagination.
+
+    :param prefix: the S3 folder.
+    :type prefix: str
+    :return: list of keys
+    """
+    state = await _get_state()
+    keys = []
+    paginator = state['client'].get_paginator('list_objects_v2')
+    async with state['semaphore']:
+        async for page in paginator.paginate(Bucket=state['bucket'], Prefix=prefix):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+    return keys
+
+
+async def download_to_df(path: str, file_type: str='csv', **kwargs) -> pd.DataFrame:
+    """
+    Download a DataFrame from S3. Parsing runs on the default executor.
+
+    :param path: Full S3 path (filename should be included)
+    :type path: str
+    :param file_type: Can be 'csv', 'excel', or 'parquet'
+    :type file_type: str
+    :param kwargs: kwargs passed to the pandas reader
+    :type kwargs: dict
+    :return: DataFrame
+    """
+    if file_type not in _VALID_ENGINE_TYPE:
+        raise TypeError('Invalid file_type parsed')
+    # Same bucket as davinci.services.s3.download_to_df
+    data = await get_object(path, bucket='aws-scs-prod-bucket')
+    read_func = _get_read_func(file_type)
+    engine = _get_engine(file_type)
+    return await _run_sync(lambda: read_func(BytesIO(data), engine=engine, **kwargs))
+
+
+def _serialize_df(df: pd.DataFrame, file_type: str) -> bytes:
+    buffer = BytesIO()
+    engine = _get_engine(file_type)
+    save_func = _get_save_func(df, file_type)
+    if file_type == 'csv':
+        buffer.write(df.to_csv(header=True, index=False).encode('utf-8'))
+    elif file_type == 'excel':
+        save_func(buffer, header=True, index=False, engine=engine)
+    elif file_type == 'parquet':
+        save_func(buffer, index=False, engine=engine)
+    else:
+        raise ValueError('Bad file_type upload for upload_df()')
+    return buffer.getvalue()
+
+
+async def upload_df(df: pd.DataFrame, path: str, file_type: str='csv') -> bool:
+    """
+    Upload a DataFrame to S3 in a single PUT. Serialization runs on
+    the default executor. Use davinci.services.s3.upload_df for frames
+    too large to hold serialized in memory.
+
+    :param df: DataFrame to upload
+    :type df: pd.DataFrame
+    :param path: Full S3 path (filename should be included)
+    :type path: str
+    :param file_type: Can be 'csv', 'excel', or 'parquet'
+    :type file_type: str
+    :return: True
+    """
+    body = await _run_sync(_serialize_df, df, file_type)
+    state = await _get_state()
+    async with state['semaphore']:
+        await state['client'].put_object(Bucket=state['bucket'], Key=path, Body=body)
+    return True
@@ -0,0 +1,191 @@
+"""Local content cache for S3 downloads. Objects are stored in a cache
+directory with a manifest of ETag, size and last-modified per key, and
+are revalidated with a conditional GET (If-None-Match) before reuse, so
+repeated runs on the same machine only transfer objects that changed,
+in a single request.
+
+The cache directory and size limit can be set with the
+DAVINCI_S3_CACHE_DIR and DAVINCI_S3_CACHE_MAX_BYTES environment variables.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from botocore.exceptions import ClientError
+
+from davinci.services.auth import get_s3_client
+from davinci.utils.logging import logger
+
+_DEFAULT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'davinci', 's3')
+_DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+_CHUNK_BYTES = 1024 ** 2
+
+
+class S3Cache:
+    """
+    ETag-validated, size-bounded cache of S3 objects on local disk.
+    Least recently used objects are evicted once the total size
+    passes max_bytes. All writes are atomic, and the manifest is
+    updated under a file lock, so processes can share a cache_dir.
+
+    :param cache_dir: Folder for cached objects and the manifest.
+    :type cache_dir: str
+    :param max_bytes: Max total size of cached objects.
+    :type max_bytes: int
+
+    Example usage:
+
+    .. code-block:: python
+
+        cache = S3Cache('/tmp/s3cache', max_bytes=2 * 1024 ** 3)
+        local_path = cache.fetch('aws-scs-prod-bucket', 'prod/project/file.parquet')
+
+    """
+    def __init__(self, cache_dir: str=None, max_bytes: int=None):
+        self.cache_dir = cache_dir or os.environ.get('DAVINCI_S3_CACHE_DIR', _DEFAULT_DIR)
+        self.max_bytes = int(max_bytes or os.environ.get('DAVINCI_S3_CACHE_MAX_BYTES', _DEFAULT_MAX_BYTES))
+        self.manifest_path = os.path.join(self.cache_dir, 'manifest.json')
+        self.lock_path = os.path.join(self.cache_dir, 'manifest.lock')
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        """Hold the manifest lock across threads and, where flock exists, processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.manifest')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _evict(self, manifest, keep=None):
+        """Drop least recently used entries, except keep, until under max_bytes."""
+        total = sum(entry['size'] for entry in manifest.values())
+        for entry_id, entry in sorted(manifest.items(), key=lambda kv: kv[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if entry_id == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['file']))
+            except FileNotFoundError:
+                pass
+            total -= entry['size']
+            del manifest[entry_id]
+
+    def fetch(self, bucket: str, key: str) -> str:
+        """
+        Return a local path holding the current content of an S3 object,
+        downloading it only if it is missing or its ETag changed.
+
+        :param bucket: S3 bucket
+        :type bucket: str
+        :param key: S3 key
+        :type key: str
+        :return: path to the cached file. Treat it as read-only.
+        :rtype: str
+        """
+        entry_id = hashlib.sha1(f'{bucket}/{key}'.encode('utf-8')).hexdigest()
+        s3 = get_s3_client()
+        with self._locked():
+            entry = self._load_manifest().get(entry_id)
+        local_file = os.path.join(self.cache_dir, entry_id)
+
+        get_args = {'Bucket': bucket, 'Key': key}
+        if entry and os.path.exists(local_file):
+            get_args['IfNoneMatch'] = entry['etag']
+        try:
+            obj = s3.get_object(**get_args)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != '304':
+                raise
+            obj = None
+
+        if obj is not None:
+            # The ETag and size come from the same response as the body,
+            # so the manifest always describes the bytes on disk.
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    shutil.copyfileobj(obj['Body'], f, _CHUNK_BYTES)
+                os.replace(tmp_path, local_file)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            logger.info(f'S3 cache miss: {key} ({obj["ContentLength"]} bytes)')
+        else:
+            logger.info(f'S3 cache hit: {key}')
+
+        with self._locked():
+            manifest = self._load_manifest()
+            if obj is not None:
+                manifest[entry_id] = {
+                    'bucket': bucket,
+                    'key': key,
+                    'file': entry_id,
+                    'etag': obj['ETag'],
+                    'size': obj['ContentLength'],
+                    'last_modified': obj['LastModified'].isoformat(),
+                }
+            elif entry_id not in manifest:
+                manifest[entry_id] = entry
+            manifest[entry_id]['last_access'] = time.time()
+            self._evict(manifest, keep=entry_id)
+            self._save_manifest(manifest)
+        return local_file
+
+    def clear(self):
+        """Remove every cached object."""
+        with self._locked():
+            manifest = self._load_manifest()
+            for entry in manifest.values():
+                try:
+                    os.remove(os.path.join(self.cache_dir, entry['file']))
+                except FileNotFoundError:
+                    pass
+            self._save_manifest({})
+
+
+_DEFAULT_CACHE = {'cache': None}
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def get_s3_cache() -> S3Cache:
+    """
+    The process-wide S3Cache used by davinci.services.s3.
+
+    :return: S3Cache
+    """
+    with _DEFAULT_CACHE_LOCK:
+        if _DEFAULT_CACHE['cache'] is None:
+            _DEFAULT_CACHE['cache'] = S3Cache()
+        return _DEFAULT_CACHE['cache']
@@ -2,14 +2,132 @@ import numpy as np
 import pandas as pd
 import sqlalchemy as sa
 import numbers
-
-from datetime import datetime
-
-from davinci.services.auth import open_sql_connection, get_secret
+import os
+import json
+import time
+from io import BytesIO
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal, Context, InvalidOperation
+from functools import lru_cache
+
+from davinci.services.auth import open_sql_connection, get_secret, get_s3_client, secrets_manager
 from davinci.utils.logging import log, logger
+from davinci.utils.tracing import traced, current_span, submit_in_context
 from davinci.services.auth import get_secret
+from davinci.services import sql_stats
 from davinci.utils.global_config import ENV
 
+_MAX_PARTITION_WORKERS = 8
+"""
+Hard cap on concurrent partition queries against a single database,
+regardless of what the caller asks for. Keeps the warehouse safe.
+"""
+_SQL_ENGINES = {}
+
+
+@lru_cache()
+def _get_sql_engine(db='FINAL_SQL_DATABASE'):
+    """
+    Build and cache a pooled SQLAlchemy engine for a database.
+    The engine is created once per process and db key, so
+    repeated callers share the same connection pool.
+
+    :param db: The database secret key to connect to.
+    :type db: str
+    :return: SQLAlchemy engine
+    """
+    connection_uri = sa.engine.URL.create(
+        "mssql+pyodbc",
+        username=get_secret('SQL_USER'),
+        password=get_secret('SQL_PASSWORD'),
+        host=get_secret('SQL_SERVER'),
+        database=get_secret(db, doppler=True),
+        query={"driver": "ODBC Driver 17 for SQL Server"},
+    )
+    engine = sa.create_engine(connection_uri, connect_args={'connect_timeout': 5}, echo=False,
+        pool_size=_MAX_PARTITION_WORKERS, max_overflow=0, pool_pre_ping=True)
+    # lru_cache cannot be iterated, so keep the engines reachable for disposal.
+    _SQL_ENGINES[db] = engine
+    return engine
+
+def _on_sql_credentials_change(changed):
+    """Dispose and drop pooled engines built with rotated SQL credentials."""
+    logger.info(f'SQL credentials changed ({sorted(changed)}); rebuilding pooled engines.')
+    for db in list(_SQL_ENGINES):
+        # Closes idle pooled connections; checked-out ones close when returned.
+        _SQL_ENGINES.pop(db).dispose()
+    _get_sql_engine.cache_clear()
+
+secrets_manager.on_change(['SQL_USER', 'SQL_PASSWORD', 'SQL_SERVER'], _on_sql_credentials_change)
+
+def _partition_bounds(lower, upper, n_partitions):
+    """
+    Split the closed range [lower, upper] into n_partitions
+    contiguous ranges. Works for numeric, datetime and date bounds.
+
+    :return: list of (low, high) tuples in ascending order
+    :rtype: List[Tuple]
+    """
+    if isinstance(lower, (datetime, np.datetime64, pd.Timestamp)):
+        edges = list(pd.date_range(pd.Timestamp(lower), pd.Timestamp(upper), periods=n_partitions + 1))
+    elif isinstance(lower, date):
+        # DATE columns come back as datetime.date; keep the edges as whole days.
+        edges = sorted(set(e.date() for e in pd.date_range(pd.Timestamp(lower), pd.Timestamp(upper),
+            periods=n_partitions + 1)))
+    elif isinstance(lower, numbers.Integral) and isinstance(upper, numbers.Integral):
+        edges = sorted(set(int(e) for e in np.linspace(int(lower), int(upper), n_partitions + 1)))
+    else:
+        edges = list(np.linspace(float(lower), float(upper), n_partitions + 1))
+    if len(edges) < 2:
+        edges = [lower, upper]
+    return list(zip(edges[:-1], edges[1:]))
+
+def _read_sql(stmt, db, params=None, pooled=False, **kwargs):
+    """
+    Read a query into a DataFrame and record it in sql_stats.
+    Uses a fresh pyodbc connection, or the pooled engine when pooled=True.
+    """
+    with sql_stats._record(stmt, db) as info:
+        start = time.perf_counter()
+        if pooled:
+            ctx = _get_sql_engine(db).connect()
+            stmt = sa.text(stmt)
+        else:
+            ctx = open_sql_connection(db=db)
+        with ctx as conn:
+            info['pool_wait_sec'] = time.perf_counter() - start
+            # Statistics capture bypasses pd.read_sql, so skip it when the
+            # caller passed read_sql kwargs that would change the result.
+            if sql_stats._CONFIG['capture_statistics'] and not pooled and not params and not kwargs:
+                df, info['statistics'] = sql_stats._read_with_statistics(conn, stmt)
+            else:
+                df = pd.read_sql(stmt, con=conn, params=params, **kwargs)
+        info['rows'] = len(df)
+        info['bytes'] = sql_stats._df_bytes(df)
+    return df
+
+def _iter_sql_partitions(queries, db, max_workers, params=None, **kwargs):
+    """
+    Run the partition queries concurrently and yield frames in order.
+    At most max_workers queries are submitted ahead of the consumer,
+    so a stream only holds that many frames in memory.
+    """
+
+    def _read(stmt, bounds):
+        return _read_sql(stmt, db, params={**(params or {}), **bounds}, pooled=True, **kwargs)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for stmt, bounds in queries:
+            if len(in_flight) >= max_workers:
+                yield in_flight.popleft().result()
+            in_flight.append(submit_in_context(executor, _read, stmt, bounds))
+        while in_flight:
+            yield in_flight.popleft().result()
+
 
 @log()
 def get_table(table, db='FINAL_SQL_DATABASE', **kwargs):
@@ -27,11 +145,10 @@ def get_table(table, db='FINAL_SQL_DATABASE', **kwargs):
     :type kwargs: dict
     """
     stmt = f"SELECT * FROM {table};"
-    with open_sql_connection(db=db) as conn: 
-        df = pd.read_sql(stmt, con=conn, **kwargs)
-    return df
+    return _read_sql(stmt, db, **kwargs)
 
 @log()
+@traced('sql.get_sql', capture=('db',))
 def get_sql(sql_stmt, db='FINAL_SQL_DATABASE', **kwargs):
     """
     Generic query handler. This is the one you will most
@@ -46,8 +163,437 @@ def get_sql(sql_stmt, db='FINAL_SQL_DATABASE', **kwargs):
     :param kwargs: kwargs passed to pd.read_sql
     :type kwargs: dict
     """
-    with open_sql_connection(db=db) as conn: 
-        df = pd.read_sql(sql_stmt, con=conn, **kwargs)
+    return _read_sql(sql_stmt, db, **kwargs)
+
+@log()
+@traced('sql.get_sql_partitioned', capture=('partition_col', 'db'))
+def get_sql_partitioned(sql_stmt, partition_col, lower=None, upper=None, n_partitions=4,
+        max_workers=4, db='FINAL_SQL_DATABASE', stream=False, params=None, **kwargs):
+    """
+    Split a query into ranges over a numeric or date column and
+    pull them concurrently over pooled connections. Useful for
+    large EDW fact tables where a single connection is the bottleneck.
+
+    .. warning::
+        Rows where partition_col is NULL are not returned. The statement
+        is wrapped as a subquery, so it must not contain a bare ORDER BY.
+
+    :param sql_stmt: The query to partition.
+    :type sql_stmt: str
+
+    :param partition_col: Column in the query output to split on.
+    :type partition_col: str
+
+    :param lower: Lower bound (inclusive). Queried with MIN() when omitted.
+    :type lower: int, float, datetime or date
+
+    :param upper: Upper bound (inclusive). Queried with MAX() when omitted.
+    :type upper: int, float, datetime or date
+
+    :param n_partitions: Number of ranges to split into.
+    :type n_partitions: int
+
+    :param max_workers: Number of concurrent queries. Capped at
+        _MAX_PARTITION_WORKERS to avoid overloading the warehouse.
+    :type max_workers: int
+
+    :param db: The database to get from.
+    :type db: str
+
+    :param stream: If True, return a generator yielding each partition's
+        DataFrame in range order instead of a single concatenated frame.
+        Only max_workers partitions are fetched ahead of the consumer.
+    :type stream: bool
+
+    :param params: Named parameters used in sql_stmt, e.g. {'site': 'ATL'}
+        for "... WHERE Site = :site".
+    :type params: dict
+
+    :param kwargs: kwargs passed to pd.read_sql
+    :type kwargs: dict
+
+    :return: DataFrame, or generator of DataFrames when stream=True
+
+    Example usage:
+
+        .. code-block:: python
+
+            df = get_sql_partitioned(
+                "SELECT * FROM fact.Shipments WHERE Site = 'ATL'",
+                partition_col='ShipDate',
+                n_partitions=8,
+                max_workers=4,
+                db='EDW_SQL_DATABASE',
+            )
+    """
+    if lower is None or upper is None:
+        bounds = _read_sql(f"""
+            SELECT MIN({partition_col}) AS lo, MAX({partition_col}) AS hi
+            FROM ({sql_stmt}) AS _bounds
+        """, db, params=params, pooled=True)
+        lower = bounds['lo'].iloc[0] if lower is None else lower
+        upper = bounds['hi'].iloc[0] if upper is None else upper
+    if pd.isnull(lower) or pd.isnull(upper):
+        empty = _read_sql(f"SELECT * FROM ({sql_stmt}) AS _part WHERE 0 = 1", db, params=params, pooled=True,
+            **kwargs)
+        return iter([empty]) if stream else empty
+
+    ranges = _partition_bounds(lower, upper, max(int(n_partitions), 1))
+    queries = []
+    for i, (lo, hi) in enumerate(ranges):
+        upper_op = '<=' if i == len(ranges) - 1 else '<'
+        stmt = (f"SELECT * FROM ({sql_stmt}) AS _part "
+            f"WHERE {partition_col} >= :_part_lo AND {partition_col} {upper_op} :_part_hi")
+        queries.append((stmt, {'_part_lo': lo, '_part_hi': hi}))
+
+    max_workers = max(1, min(int(max_workers), _MAX_PARTITION_WORKERS, len(queries)))
+    frames = _iter_sql_partitions(queries, db, max_workers, params=params, **kwargs)
+    if stream:
+        return frames
+    return pd.concat(list(frames), ignore_index=True)
+
+def _encode_key(value):
+    """Make a keyset value JSON-safe for checkpointing."""
+    if isinstance(value, (datetime, np.datetime64, pd.Timestamp)):
+        return {'type': 'datetime', 'value': pd.Timestamp(value).isoformat()}
+    if isinstance(value, date):
+        return {'type': 'date', 'value': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'type': 'decimal', 'value': str(value)}
+    if isinstance(value, numbers.Integral):
+        return {'type': 'int', 'value': int(value)}
+    if isinstance(value, numbers.Real):
+        return {'type': 'float', 'value': float(value)}
+    return {'type': 'str', 'value': str(value)}
+
+def _decode_key(encoded):
+    """Inverse of _encode_key."""
+    if encoded is None:
+        return None
+    if encoded['type'] == 'datetime':
+        return pd.Timestamp(encoded['value']).to_pydatetime()
+    if encoded['type'] == 'date':
+        return date.fromisoformat(encoded['value'])
+    if encoded['type'] == 'decimal':
+        return Decimal(encoded['value'])
+    return encoded['value']
+
+def _read_checkpoint(path, to_s3):
+    """Load an export checkpoint, or None if it doesn't exist yet."""
+    if to_s3:
+        s3 = get_s3_client()
+        try:
+            obj = s3.get_object(Bucket=get_secret('AWS_BUCKET_NAME'), Key=path)
+        except s3.exceptions.NoSuchKey:
+            return None
+        return json.loads(obj['Body'].read())
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _write_checkpoint(state, path, to_s3):
+    """Persist an export checkpoint. Local writes are atomic."""
+    body = json.dumps(state)
+    if to_s3:
+        get_s3_client().put_object(Bucket=get_secret('AWS_BUCKET_NAME'), Key=path, Body=body.encode('utf-8'))
+        return
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+def _write_parquet_page(df, path, to_s3):
+    """Write a single page of an export to local disk or S3."""
+    if to_s3:
+        buffer = BytesIO()
+        df.to_parquet(buffer, index=False, engine='pyarrow')
+        get_s3_client().put_object(Bucket=get_secret('AWS_BUCKET_NAME'), Key=path, Body=buffer.getvalue())
+        return
+    tmp_path = path + '.tmp'
+    df.to_parquet(tmp_path, index=False, engine='pyarrow')
+    os.replace(tmp_path, path)
+
+@log()
+def get_primary_key(table, db='FINAL_SQL_DATABASE'):
+    """
+    Get the primary key column(s) of a table, in key order.
+
+    :param table: The table to inspect. May be schema or db qualified.
+    :type table: str
+
+    :param db: The database to get from.
+    :type db: str
+
+    :return: list of primary key column names
+    :rtype: List[Str]
+    """
+    parts = [p.strip('[]') for p in table.split('.')]
+    schema = parts[-2] if len(parts) > 1 else 'dbo'
+    pk = _read_sql(f"""
+        SELECT KU.COLUMN_NAME
+        FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS AS TC
+        JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS KU
+            ON TC.CONSTRAINT_NAME = KU.CONSTRAINT_NAME
+            AND TC.TABLE_SCHEMA = KU.TABLE_SCHEMA
+            AND TC.TABLE_NAME = KU.TABLE_NAME
+        WHERE TC.CONSTRAINT_TYPE = 'PRIMARY KEY'
+            AND TC.TABLE_SCHEMA = '{schema}'
+            AND TC.TABLE_NAME = '{parts[-1]}'
+        ORDER BY KU.ORDINAL_POSITION
+    """, db, pooled=True)
+    return pk['COLUMN_NAME'].tolist()
+
+@log()
+def export_table_to_parquet(table, out_path, key_col=None, page_size=100000,
+        db='FINAL_SQL_DATABASE', to_s3=False, columns=None):
+    """
+    Export an entire table as a folder of Parquet files, one file
+    per keyset-paginated page. Unlike get_table, only one page is
+    ever held in memory. A checkpoint is written after every page,
+    so rerunning the same call after a crash resumes where it stopped.
+
+    .. warning::
+        key_col must be unique and non-null, otherwise rows sharing
+        a key across a page boundary may be skipped. The primary key
+        is used when key_col is omitted.
+
+    :param table: The table to export.
+    :type table: str
+
+    :param out_path: Local folder, or S3 prefix when to_s3 is True.
+    :type out_path: str
+
+    :param key_col: Column to order and page by. Defaults to the
+        table's single-column primary key.
+    :type key_col: str
+
+    :param page_size: Rows per page (and per Parquet file).
+    :type page_size: int
+
+    :param db: The database to get from.
+    :type db: str
+
+    :param to_s3: Write pages and checkpoint to S3 instead of local disk.
+    :type to_s3: bool
+
+    :param columns: Optional list of columns to export. Defaults to all.
+    :type columns: List[str]
+
+    :return: total number of rows exported, including previous runs
+    :rtype: int
+
+    Example usage:
+
+        .. code-block:: python
+
+            export_table_to_parquet('fact.Shipments', 'exports/shipments',
+                key_col='ShipmentID', to_s3=True, db='EDW_SQL_DATABASE')
+    """
+    if key_col is None:
+        pk = get_primary_key(table, db=db)
+        if len(pk) != 1:
+            raise ValueError(f'Could not infer a single-column key for {table} (found {pk}). Pass key_col.')
+        key_col = pk[0]
+
+    out_path = out_path.rstrip('/')
+    if not to_s3:
+        os.makedirs(out_path, exist_ok=True)
+    checkpoint_path = f'{out_path}/_checkpoint.json'
+    state = _read_checkpoint(checkpoint_path, to_s3)
+    if state is None or state.get('table') != table or state.get('key_col') != key_col:
+        state = {'table': table, 'key_col': key_col, 'last_key': None, 'part': 0, 'rows': 0, 'done': False}
+    if state['done']:
+        logger.info(f'Export of {table} already complete ({state["rows"]} rows).')
+        return state['rows']
+
+    select_cols = ', '.join(columns if key_col in columns else columns + [key_col]) if columns else '*'
+    while True:
+        last_key = _decode_key(state['last_key'])
+        where = f'WHERE {key_col} > :last_key' if last_key is not None else ''
+        stmt = f'SELECT TOP ({int(page_size)}) {select_cols} FROM {table} {where} ORDER BY {key_col}'
+        params = {'last_key': last_key} if last_key is not None else {}
+        page = _read_sql(stmt, db, params=params, pooled=True)
+        if page.empty:
+            break
+
+        _write_parquet_page(page, f'{out_path}/part-{state["part"]:05d}.parquet', to_s3)
+        state['last_key'] = _encode_key(page[key_col].iloc[-1])
+        state['part'] += 1
+        state['rows'] += len(page)
+        _write_checkpoint(state, checkpoint_path, to_s3)
+        logger.info(f'Exported page {state["part"]} of {table} ({state["rows"]} rows so far).')
+        if len(page) < page_size:
+            break
+
+    state['done'] = True
+    _write_checkpoint(state, checkpoint_path, to_s3)
+    return state['rows']
+
+class FileWatermarkStore:
+    """
+    High-water marks kept in a small JSON file, keyed by
+    (db, table, column), on local disk or S3. Local writes are atomic.
+
+    :param path: Path to the JSON state file.
+    :param to_s3: Keep the file on S3, at path within the bucket.
+    """
+    def __init__(self, path: str='.davinci_watermarks.json', to_s3: bool=False):
+        self.path = path
+        self.to_s3 = to_s3
+
+    def _load(self):
+        state = _read_checkpoint(self.path, to_s3=self.to_s3)
+        return state or {}
+
+    def get(self, key: str):
+        """Return the stored mark for key, or None."""
+        return _decode_key(self._load().get(key))
+
+    def set(self, key: str, value):
+        """Store the mark for key."""
+        state = self._load()
+        state[key] = _encode_key(value)
+        folder = os.path.dirname(self.path)
+        if folder and not self.to_s3:
+            os.makedirs(folder, exist_ok=True)
+        _write_checkpoint(state, self.path, to_s3=self.to_s3)
+
+class SQLWatermarkStore:
+    """
+    High-water marks kept in a SQL table, keyed by (db, table, column).
+    The table is created on first use.
+
+    :param table: Name of the state table.
+    :param db: The database secret key for the state table.
+    """
+    def __init__(self, table: str='dbo.etlWatermarks', db: str='INFO_DATABASE'):
+        self.table = table
+        self.db = db
+        self._ensure_table()
+
+    def _ensure_table(self):
+        with _get_sql_engine(self.db).begin() as con:
+            con.execute(sa.text(f"""
+                IF OBJECT_ID('{self.table}', 'U') IS NULL
+                CREATE TABLE {self.table} (
+                    [WatermarkKey] VARCHAR(400) PRIMARY KEY,
+                    [Watermark] NVARCHAR(400),
+                    [Modified] DATETIME DEFAULT GETDATE()
+                )
+            """))
+
+    def get(self, key: str):
+        """Return the stored mark for key, or None."""
+        with _get_sql_engine(self.db).connect() as con:
+            row = con.execute(sa.text(f"SELECT [Watermark] FROM {self.table} WHERE [WatermarkKey] = :key"),
+                {'key': key}).fetchone()
+        return _decode_key(json.loads(row[0])) if row else None
+
+    def set(self, key: str, value):
+        """Store the mark for key."""
+        with _get_sql_engine(self.db).begin() as con:
+            con.execute(sa.text(f"""
+                MERGE {self.table} AS Target
+                USING (SELECT :key AS [WatermarkKey], :mark AS [Watermark]) AS Source
+                    ON Source.[WatermarkKey] = Target.[WatermarkKey]
+                WHEN MATCHED THEN
+                    UPDATE SET Target.[Watermark] = Source.[Watermark], Target.[Modified] = GETDATE()
+                WHEN NOT MATCHED BY Target THEN
+                    INSERT ([WatermarkKey], [Watermark]) VALUES (Source.[WatermarkKey], Source.[Watermark]);
+            """), {'key': key, 'mark': json.dumps(_encode_key(value))})
+
+@log()
+def extract_incremental(table, watermark_col, out_path, db='FINAL_SQL_DATABASE', store=None,
+        lookback=None, to_s3=False, columns=None, where=None):
+    """
+    Pull only the rows of a table that are newer than the last
+    stored high-water mark, and append them to a Parquet dataset
+    as a new part file. The mark is advanced only after the part
+    file has been written, so a failed run is simply retried.
+
+    .. warning::
+        With lookback set, rows inside the lookback window are pulled
+        again on every run to catch late-arriving data. Consumers
+        should drop duplicates on the table's key when reading.
+
+    :param table: The source table.
+    :type table: str
+
+    :param watermark_col: Monotonic column to track, e.g. a
+        modified date or identity column.
+    :type watermark_col: str
+
+    :param out_path: Local folder, or S3 prefix when to_s3 is True.
+    :type out_path: str
+
+    :param db: The database to get from.
+    :type db: str
+
+    :param store: FileWatermarkStore or SQLWatermarkStore. Defaults
+        to a FileWatermarkStore at out_path/_watermarks.json, on S3
+        when to_s3 is True, so the mark lives next to the data.
+    :type store: FileWatermarkStore or SQLWatermarkStore
+
+    :param lookback: Window to re-read behind the mark. A timedelta
+        for date columns or a number for numeric columns.
+    :type lookback: datetime.timedelta or int or float
+
+    :param to_s3: Write part files to S3 instead of local disk.
+    :type to_s3: bool
+
+    :param columns: Optional list of columns to extract. Defaults to all.
+    :type columns: List[str]
+
+    :param where: Optional extra SQL filter ANDed to the watermark filter.
+    :type where: str
+
+    :return: the newly extracted rows
+    :rtype: pd.DataFrame
+
+    Example usage:
+
+        .. code-block:: python
+
+            from datetime import timedelta
+
+            new_rows = extract_incremental(
+                'dbo.Orders', 'ModifiedDate', 'extracts/orders',
+                to_s3=True, lookback=timedelta(days=2),
+                store=SQLWatermarkStore(),
+            )
+    """
+    out_path = out_path.rstrip('/')
+    if store is None:
+        store = FileWatermarkStore(f'{out_path}/_watermarks.json', to_s3=to_s3)
+    key = f'{db}|{table}|{watermark_col}'
+    mark = store.get(key)
+
+    filters = [f'({where})'] if where else []
+    params = {}
+    if mark is not None:
+        params['mark'] = mark - lookback if lookback else mark
+        filters.append(f'{watermark_col} {">=" if lookback else ">"} :mark')
+    select_cols = ', '.join(columns if watermark_col in columns else columns + [watermark_col]) if columns else '*'
+    stmt = f"SELECT {select_cols} FROM {table} {'WHERE ' + ' AND '.join(filters) if filters else ''}"
+
+    df = _read_sql(stmt, db, params=params, pooled=True)
+    if df.empty or df[watermark_col].isnull().all():
+        logger.info(f'No new rows in {table} past {mark}.')
+        return df
+    new_mark = df[watermark_col].max()
+    if mark is not None and not new_mark > mark:
+        # Only rows from the lookback window came back; they are already stored.
+        logger.info(f'No new rows in {table} past {mark}.')
+        return df.iloc[0:0]
+
+    if not to_s3:
+        os.makedirs(out_path, exist_ok=True)
+    part_name = datetime.utcnow().strftime('part-%Y%m%dT%H%M%S%f.parquet')
+    _write_parquet_page(df, f'{out_path}/{part_name}', to_s3)
+
+    store.set(key, new_mark)
+    logger.info(f'Extracted {len(df)} rows from {table}; watermark now {new_mark}.')
     return df
 
 @log()
@@ -81,22 +627,27 @@ def write_df_to_table(df, table, db='FINAL_SQL_DATABASE'):
         except TypeError:
             return x
 
-    with open_sql_connection(db=db) as conn:
-        cursor = conn.cursor()
-        # define the insert query
-        column_list = df.columns
-        placeholder = ", ".join(["?"] * len(column_list))
-        stmt = "INSERT INTO {table} ({columns}) VALUES ({values});".format(
-            table=table,
-            columns=",".join(column_list),
-            values=placeholder)
-        # loop through each row in the matrix
-        for _, row in df.iterrows():
-            values = row.to_list()
-            values = [cast_null(try_int(v)) for v in values]
-            cursor.execute(stmt, values)
-            cursor.commit()
-        cursor.close()
+    # define the insert query
+    column_list = df.columns
+    placeholder = ", ".join(["?"] * len(column_list))
+    stmt = "INSERT INTO {table} ({columns}) VALUES ({values});".format(
+        table=table,
+        columns=",".join(column_list),
+        values=placeholder)
+    with sql_stats._record(stmt, db, kind='insert') as info:
+        start = time.perf_counter()
+        with open_sql_connection(db=db) as conn:
+            info['pool_wait_sec'] = time.perf_counter() - start
+            cursor = conn.cursor()
+            # loop through each row in the matrix
+            for _, row in df.iterrows():
+                values = row.to_list()
+                values = [cast_null(try_int(v)) for v in values]
+                cursor.execute(stmt, values)
+                cursor.commit()
+            cursor.close()
+        info['rows'] = len(df)
+        info['bytes'] = sql_stats._df_bytes(df)
 
 @log()
 def update_sql_rows(data: dict, where_clause: str, table: str, db='FINAL_SQL_DATABASE'):
@@ -125,11 +676,15 @@ def update_sql_rows(data: dict, where_clause: str, table: str, db='FINAL_SQL_DAT
     # SQL Statement
     stmt = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
 
-    with open_sql_connection(db=db) as conn:
-        cursor = conn.cursor()
-        result = cursor.execute(stmt, list(data.values())).rowcount
-        cursor.commit()
-        cursor.close()
+    with sql_stats._record(stmt, db, kind='update') as info:
+        start = time.perf_counter()
+        with open_sql_connection(db=db) as conn:
+            info['pool_wait_sec'] = time.perf_counter() - start
+            cursor = conn.cursor()
+            result = cursor.execute(stmt, list(data.values())).rowcount
+            cursor.commit()
+            cursor.close()
+        info['rows'] = result
 
     return result
 
@@ -155,11 +710,15 @@ def delete_sql_rows(where_clause: str, table: str, db='FINAL_SQL_DATABASE'):
     # SQL Statement
     stmt = f"DELETE FROM {table} WHERE {where_clause}"
 
-    with open_sql_connection(db=db) as conn:
-        cursor = conn.cursor()
-        result = cursor.execute(stmt).rowcount
-        cursor.commit()
-        cursor.close()
+    with sql_stats._record(stmt, db, kind='delete') as info:
+        start = time.perf_counter()
+        with open_sql_connection(db=db) as conn:
+            info['pool_wait_sec'] = time.perf_counter() - start
+            cursor = conn.cursor()
+            result = cursor.execute(stmt).rowcount
+            cursor.commit()
+            cursor.close()
+        info['rows'] = result
 
     return result
 
@@ -203,13 +762,269 @@ def get_ordered_cols(table, db='FINAL_SQL_DATABASE'):
     """, db=db)
     return empty_df.columns.tolist()
 
+_INT_TYPES = {'tinyint', 'smallint', 'int', 'bigint'}
+_FLOAT_TYPES = {'float', 'real'}
+_DECIMAL_TYPES = {'decimal', 'numeric', 'money', 'smallmoney'}
+_DECIMAL_CONTEXT = Context(prec=38)
+_DATETIME_TYPES = {'datetime', 'datetime2', 'smalldatetime', 'datetimeoffset'}
+_STRING_TYPES = {'char', 'varchar', 'text', 'nchar', 'nvarchar', 'ntext', 'uniqueidentifier'}
+_BINARY_TYPES = {'binary', 'varbinary', 'image'}
+
+@lru_cache(maxsize=256)
+def _get_table_columns(name, db='SQL_DATABASE', schema=None):
+    """
+    Read and cache a table's column definitions from INFORMATION_SCHEMA.
+    Call _get_table_columns.cache_clear() after altering a table.
+
+    :return: DataFrame of COLUMN_NAME, DATA_TYPE, lengths and precisions,
+        in ordinal order. Empty if the table does not exist.
+    :rtype: pd.DataFrame
+    """
+    return _read_sql(f"""
+        SELECT COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION,
+            NUMERIC_SCALE, DATETIME_PRECISION
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = '{schema or 'dbo'}' AND TABLE_NAME = '{name}'
+        ORDER BY ORDINAL_POSITION
+    """, db, pooled=True)
+
+def _to_nullable_objects(values, mask):
+    """Convert an array to Python objects with None wherever mask is True."""
+    out = np.asarray(values).astype(object)
+    out[np.asarray(mask)] = None
+    return out
+
+def _check_coerced(s, bad):
+    """Raise instead of silently turning unconvertible values into NULLs."""
+    bad = np.asarray(bad) & np.asarray(s.notna())
+    if bad.any():
+        examples = list(s[bad].head(3))
+        raise ValueError(f'Column {s.name!r}: {int(bad.sum())} values could not be converted, e.g. {examples}.')
+
+def _to_decimals(s, scale):
+    """Exact Decimal objects rounded to the column's scale, with nulls as None."""
+    exp = Decimal(1).scaleb(-int(scale))
+    isnull = s.isna().to_numpy()
+    out = np.empty(len(s), dtype=object)
+    bad = np.zeros(len(s), dtype=bool)
+    for i, v in enumerate(s.to_numpy(dtype=object)):
+        if isnull[i]:
+            out[i] = None
+            continue
+        try:
+            out[i] = Decimal(str(v)).quantize(exp, context=_DECIMAL_CONTEXT)
+        except (InvalidOperation, ValueError):
+            out[i] = None
+            bad[i] = True
+    _check_coerced(s, bad)
+    return out
+
+def _to_strings(s):
+    """Text for char/text columns. Whole floats are written without '.0'."""
+    isnull = s.isna().to_numpy()
+    out = np.empty(len(s), dtype=object)
+    for i, v in enumerate(s.to_numpy(dtype=object)):
+        if isnull[i]:
+            out[i] = None
+        elif isinstance(v, float) and v.is_integer():
+            out[i] = str(int(v))
+        elif isinstance(v, (bytes, bytearray)):
+            out[i] = bytes(v).decode('utf-8')
+        else:
+            out[i] = str(v)
+    return out
+
+def _to_bytes(s):
+    """bytes for binary columns. Anything else is rejected, not stringified."""
+    isnull = s.isna().to_numpy()
+    out = np.empty(len(s), dtype=object)
+    bad = np.zeros(len(s), dtype=bool)
+    for i, v in enumerate(s.to_numpy(dtype=object)):
+        if isnull[i]:
+            out[i] = None
+        elif isinstance(v, (bytes, bytearray, memoryview)):
+            out[i] = bytes(v)
+        else:
+            out[i] = None
+            bad[i] = True
+    _check_coerced(s, bad)
+    return out
+
+def _to_times(s):
+    """datetime.time objects for time columns, from times, timedeltas or strings."""
+    isnull = s.isna().to_numpy()
+    out = np.empty(len(s), dtype=object)
+    bad = np.zeros(len(s), dtype=bool)
+    for i, v in enumerate(s.to_numpy(dtype=object)):
+        if isnull[i]:
+            out[i] = None
+            continue
+        try:
+            if isinstance(v, dt_time):
+                out[i] = v
+            elif isinstance(v, timedelta):
+                if not timedelta(0) <= v < timedelta(days=1):
+                    raise ValueError(v)
+                out[i] = (datetime.min + v).time()
+            else:
+                out[i] = pd.Timestamp(v).time()
+        except (TypeError, ValueError):
+            out[i] = None
+            bad[i] = True
+    _check_coerced(s, bad)
+    return out
+
+def _cast_column(s, col):
+    """
+    Cast one column to the Python objects pyodbc binds
+    natively for the column's SQL Server type, with nulls as None.
+    Raises ValueError if any non-null value cannot be converted.
+    """
+    data_type = col['DATA_TYPE']
+    if data_type in _INT_TYPES:
+        vals = pd.to_numeric(s, errors='coerce')
+        # A fractional part would be truncated, so treat it as unconvertible.
+        _check_coerced(s, vals.isna() | (vals % 1 != 0))
+        return _to_nullable_objects(vals.fillna(0).astype('int64'), vals.isna())
+    if data_type in _DECIMAL_TYPES:
+        return _to_decimals(s, 0 if pd.isnull(col['NUMERIC_SCALE']) else col['NUMERIC_SCALE'])
+    if data_type in _FLOAT_TYPES:
+        vals = pd.to_numeric(s, errors='coerce').astype('float64')
+        _check_coerced(s, vals.isna())
+        return _to_nullable_objects(vals, vals.isna())
+    if data_type == 'bit':
+        vals = pd.to_numeric(s.astype(object), errors='coerce')
+        _check_coerced(s, vals.isna())
+        return _to_nullable_objects(vals.fillna(0) != 0, vals.isna())
+    if data_type == 'date' or data_type in _DATETIME_TYPES:
+        vals = pd.to_datetime(s, errors='coerce')
+        _check_coerced(s, vals.isna())
+        if getattr(vals.dt, 'tz', None) is not None and data_type != 'datetimeoffset':
+            vals = vals.dt.tz_localize(None)
+        converted = vals.dt.date.to_numpy() if data_type == 'date' else vals.dt.to_pydatetime()
+        return _to_nullable_objects(converted, vals.isna())
+    if data_type in _STRING_TYPES:
+        return _to_strings(s)
+    if data_type in _BINARY_TYPES:
+        return _to_bytes(s)
+    if data_type == 'time':
+        return _to_times(s)
+    # Other types (xml, sql_variant, ...) are bound as they are.
+    return _to_nullable_objects(s.to_numpy(dtype=object), s.isna())
+
+def _sql_input_size(row):
+    """The pyodbc setinputsizes entry for one INFORMATION_SCHEMA column row."""
+    import pyodbc
+    data_type = row['DATA_TYPE']
+    if data_type in _INT_TYPES:
+        return (pyodbc.SQL_BIGINT, 0, 0)
+    if data_type in _DECIMAL_TYPES:
+        return (pyodbc.SQL_DECIMAL, int(row['NUMERIC_PRECISION']), int(row['NUMERIC_SCALE']))
+    if data_type in _FLOAT_TYPES:
+        return (pyodbc.SQL_DOUBLE, 0, 0)
+    if data_type == 'bit':
+        return (pyodbc.SQL_BIT, 0, 0)
+    if data_type == 'date':
+        return (pyodbc.SQL_TYPE_DATE, 0, 0)
+    if data_type in _DATETIME_TYPES:
+        precision = row['DATETIME_PRECISION']
+        return (pyodbc.SQL_TYPE_TIMESTAMP, 0, 3 if pd.isnull(precision) else int(precision))
+    if data_type == 'time':
+        precision = row['DATETIME_PRECISION']
+        return (pyodbc.SQL_SS_TIME2, 16, 7 if pd.isnull(precision) else int(precision))
+    length = row['CHARACTER_MAXIMUM_LENGTH']
+    # -1 is (n)varchar(max) / varbinary(max)
+    length = 0 if pd.isnull(length) or length < 0 else int(length)
+    if data_type == 'uniqueidentifier':
+        return (pyodbc.SQL_WVARCHAR, 36, 0)
+    if data_type in _STRING_TYPES:
+        return (pyodbc.SQL_WVARCHAR, length, 0)
+    if data_type in _BINARY_TYPES:
+        return (pyodbc.SQL_VARBINARY, length, 0)
+    # Let pyodbc pick the type from the value.
+    return None
+
 @log()
-def fast_insert_from_dataframe(df, name, db='SQL_DATABASE', schema=None, truncate=False):
+def prepare_df_for_sql(df, name, db='SQL_DATABASE', schema=None):
+    """
+    Cast every column of a DataFrame to match the target table's
+    schema, column-wise, with NaN/NaT/None all converted to None.
+    Column names are matched case-insensitively, as SQL Server does.
+    Decimal columns are bound as exact Decimals at the column's scale,
+    binary columns as bytes, and unmapped types are passed through.
+    Raises ValueError if a value cannot be converted, rather than
+    inserting NULL.
+    The schema is read once per process from INFORMATION_SCHEMA.
+
+    :param df: Dataframe to prepare
+    :type df: pd.DataFrame
+
+    :param name: The target table
+    :type name: str
+
+    :param db: The database of the table.
+    :type db: str
+
+    :param schema: the schema name
+    :type schema: str
+
+    :return: (object-dtype DataFrame ready to bind, list of pyodbc input sizes)
+    :rtype: Tuple[pd.DataFrame, List[Tuple]]
+    """
+    table_cols = _get_table_columns(name, db=db, schema=schema)
+    if table_cols.empty:
+        raise ValueError(f'Table {schema}.{name} not found in {db}.')
+    # SQL Server matches column names case-insensitively, so do the same
+    # and emit the table's own spelling.
+    by_name = {row['COLUMN_NAME'].lower(): row for _, row in table_cols.iterrows()}
+    missing = [c for c in df.columns if str(c).lower() not in by_name]
+    if missing:
+        raise ValueError(f'Columns {missing} not found in {schema}.{name}.')
+    cols = [by_name[str(c).lower()] for c in df.columns]
+    prepared = pd.DataFrame(
+        {col['COLUMN_NAME']: _cast_column(df[c], col) for c, col in zip(df.columns, cols)},
+        columns=[col['COLUMN_NAME'] for col in cols],
+    )
+    input_sizes = [_sql_input_size(col) for col in cols]
+    return prepared, input_sizes
+
+def _typed_executemany(df, name, db, schema, chunksize=10000):
+    """
+    Insert a DataFrame with typed pyodbc fast_executemany in one
+    transaction on a pooled connection.
+    """
+    prepared, input_sizes = prepare_df_for_sql(df, name, db=db, schema=schema)
+    columns = ", ".join(f"[{c}]" for c in prepared.columns)
+    placeholder = ", ".join(["?"] * len(prepared.columns))
+    stmt = f"INSERT INTO {schema or 'dbo'}.{name} ({columns}) VALUES ({placeholder})"
+    rows = list(zip(*[prepared[c].to_numpy() for c in prepared.columns]))
+    conn = _get_sql_engine(db).raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.fast_executemany = True
+        cursor.setinputsizes(input_sizes)
+        for i in range(0, len(rows), chunksize):
+            cursor.executemany(stmt, rows[i:i + chunksize])
+        conn.commit()
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+@log()
+@traced('sql.fast_insert_from_dataframe', capture=('name', 'db'))
+def fast_insert_from_dataframe(df, name, db='SQL_DATABASE', schema=None, truncate=False, typed=True):
     """
     Writes SQL table by truncating then fast_executemany appends.
     NOTE that the SQL table should, ideally, already have been defined.
     Otherwise, SQLAlchemy will give you poorly chosen default data types.
 
+    When the table exists and typed is True, columns are cast to the
+    table's schema up front (see prepare_df_for_sql) and bound as typed
+    parameters, instead of relying on df.to_sql type inference.
+
     :param df: Dataframe to write
     :type df: pd.DataFrame
     
@@ -225,8 +1040,13 @@ def fast_insert_from_dataframe(df, name, db='SQL_DATABASE', schema=None, truncat
     :param truncate: Whether to truncate the table before write.
     :type truncate: Boolean
 
+    :param typed: Cast to the table schema and bind typed parameters.
+        Falls back to df.to_sql when the table does not exist yet.
+    :type typed: Boolean
+
     :return: None
     """
+    db_key = db
     db = get_secret(db, doppler=True)
     connection_uri = sa.engine.URL.create(
         "mssql+pyodbc",
@@ -249,9 +1069,16 @@ def fast_insert_from_dataframe(df, name, db='SQL_DATABASE', schema=None, truncat
         with dbEngine.connect() as conn:
             if truncate:
                 conn.execute(sa.text("TRUNCATE TABLE {}.{}.{}".format(db, schema, name)).execution_options(autocommit=True))
-        with dbEngine.connect() as conn:
-            df.to_sql(con=dbEngine, schema=schema,
-                name=name, if_exists='append', index=False, chunksize=1000)
+        with sql_stats._record(f"INSERT INTO {db}.{schema}.{name}", db_key, kind='insert') as info:
+            if typed and not _get_table_columns(name, db=db_key, schema=schema).empty:
+                _typed_executemany(df, name, db_key, schema)
+            else:
+                with dbEngine.connect() as conn:
+                    df.to_sql(con=dbEngine, schema=schema,
+                        name=name, if_exists='append', index=False, chunksize=1000)
+            info['rows'] = len(df)
+            info['bytes'] = sql_stats._df_bytes(df)
+        current_span().set(rows=len(df))
     except Exception as e:
         logger.info(f'Failed on SQLAlchemy FastExecute. See the DaVinci pip package and following error string: {str(e)}')
         raise e
@@ -409,6 +1236,9 @@ class SQLUpsert:
                 """
             )
 
+        # Table may have been recreated with different columns
+        _get_table_columns.cache_clear()
+
         # Write records
         if populate:
             query_name = f"{self.db}.{self.schema}.{name}"
@@ -457,5 +1287,8 @@ class SQLUpsert:
     def merge_update(self):
         """Call the UPSERT procedure."""
         merge_stmt = self._make_merge_stmt()
-        with self.dbEngine.begin() as con:
-            con.execute(merge_stmt)
+        with sql_stats._record(merge_stmt, self.db_key, kind='merge') as info:
+            start = time.perf_counter()
+            with self.dbEngine.begin() as con:
+                info['pool_wait_sec'] = time.perf_counter() - start
+                info['rows'] = con.execute(merge_stmt).rowcount
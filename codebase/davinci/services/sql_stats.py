@@ -0,0 +1,289 @@
+"""In-process statistics for the SQL helpers in davinci.services.sql.
+Every instrumented statement is recorded with its fingerprint, database,
+wall time, rows, approximate bytes and connection/pool wait time, so slow
+queries can be found without grepping logs.
+
+Example usage:
+
+.. code-block:: python
+
+    from davinci.services import sql, sql_stats
+
+    df = sql.get_sql("SELECT * FROM dbo.Orders WHERE Site = 'ATL'")
+    print(sql_stats.get_sql_stats())
+
+    # Optionally flush to a file or monitoring table every 5 minutes
+    sql_stats.start_sql_stats_flusher(300, path='sql_stats.jsonl')
+
+"""
+
+import re
+import json
+import time
+import atexit
+import hashlib
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from davinci.utils.logging import logger
+
+_CONFIG = {
+    'enabled': True,
+    'capture_statistics': False,
+    'max_samples': 1000,
+    'keep_records': False,
+}
+
+_LOCK = threading.Lock()
+_SUMMARY = {}
+_PENDING = deque(maxlen=100000)
+_FLUSHER = {'thread': None, 'stop': None, 'kwargs': None}
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def configure_sql_stats(enabled: bool=True, capture_statistics: bool=False, max_samples: int=1000,
+        keep_records: bool=False):
+    """
+    Configure SQL statement instrumentation.
+
+    :param enabled: Record statistics for SQL helper calls.
+    :type enabled: bool
+    :param capture_statistics: Run get_sql with SET STATISTICS IO/TIME ON
+        and keep the server messages with each record. Adds a round trip,
+        so only turn this on while investigating. Skipped for calls that
+        pass pd.read_sql kwargs.
+    :type capture_statistics: bool
+    :param max_samples: Wall times kept per fingerprint for percentiles.
+    :type max_samples: int
+    :param keep_records: Buffer individual records for flush_sql_stats.
+        Always on while a background flusher is running; otherwise
+        only the per-fingerprint summaries are kept.
+    :type keep_records: bool
+    """
+    _CONFIG['enabled'] = enabled
+    _CONFIG['capture_statistics'] = capture_statistics
+    _CONFIG['max_samples'] = max_samples
+    _CONFIG['keep_records'] = keep_records
+
+
+def _fingerprint(stmt):
+    """
+    Normalize a statement by stripping literals and whitespace,
+    so the same query with different values groups together.
+
+    :return: (short hash, normalized text)
+    :rtype: Tuple[str, str]
+    """
+    normalized = _WHITESPACE.sub(' ', _LITERALS.sub('?', str(stmt))).strip()
+    return hashlib.md5(normalized.encode('utf-8')).hexdigest()[:12], normalized
+
+
+def _df_bytes(df):
+    """Approximate in-memory size of a DataFrame."""
+    try:
+        return int(df.memory_usage(index=False, deep=True).sum())
+    except Exception:
+        return None
+
+
+@contextmanager
+def _record(stmt, db, kind='query'):
+    """
+    Time a SQL statement and record it. The yielded dict can be
+    filled in with 'rows', 'bytes', 'pool_wait_sec' and 'statistics'.
+    """
+    info = {'rows': None, 'bytes': None, 'pool_wait_sec': None, 'statistics': None}
+    if not _CONFIG['enabled']:
+        yield info
+        return
+    start = time.perf_counter()
+    error = None
+    try:
+        yield info
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _add_record(stmt, db, kind, time.perf_counter() - start, info, error)
+
+
+def _add_record(stmt, db, kind, wall_sec, info, error):
+    fingerprint, normalized = _fingerprint(stmt)
+    keep = _CONFIG['keep_records'] or _FLUSHER['kwargs'] is not None
+    record = None if not keep else {
+        'ts': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'fingerprint': fingerprint,
+        'kind': kind,
+        'db': db,
+        'wall_sec': round(wall_sec, 6),
+        'rows': info['rows'],
+        'bytes': info['bytes'],
+        'pool_wait_sec': None if info['pool_wait_sec'] is None else round(info['pool_wait_sec'], 6),
+        'error': error,
+        'statistics': info['statistics'],
+        'statement': normalized[:1000],
+    }
+    with _LOCK:
+        summary = _SUMMARY.get(fingerprint)
+        if summary is None:
+            summary = _SUMMARY[fingerprint] = {
+                'db': db, 'kind': kind, 'statement': normalized[:200], 'calls': 0, 'errors': 0,
+                'rows': 0, 'bytes': 0, 'pool_wait_sec': 0.0,
+                'wall': deque(maxlen=_CONFIG['max_samples']),
+            }
+        summary['calls'] += 1
+        summary['errors'] += error is not None
+        summary['rows'] += info['rows'] or 0
+        summary['bytes'] += info['bytes'] or 0
+        summary['pool_wait_sec'] += info['pool_wait_sec'] or 0.0
+        summary['wall'].append(wall_sec)
+        if record is not None:
+            _PENDING.append(record)
+
+
+def get_sql_stats() -> pd.DataFrame:
+    """
+    Summarize recorded statements, one row per fingerprint,
+    sorted by total wall time.
+
+    :return: DataFrame with call counts, totals and p50/p95/p99/max wall time
+    :rtype: pd.DataFrame
+    """
+    with _LOCK:
+        rows = []
+        for fingerprint, s in _SUMMARY.items():
+            wall = np.fromiter(s['wall'], dtype=float)
+            p50, p95, p99 = np.percentile(wall, [50, 95, 99]) if len(wall) else (np.nan,) * 3
+            rows.append({
+                'fingerprint': fingerprint, 'db': s['db'], 'kind': s['kind'],
+                'calls': s['calls'], 'errors': s['errors'],
+                'total_sec': wall.sum(), 'p50_sec': p50, 'p95_sec': p95, 'p99_sec': p99,
+                'max_sec': wall.max() if len(wall) else np.nan,
+                'rows': s['rows'], 'bytes': s['bytes'], 'pool_wait_sec': s['pool_wait_sec'],
+                'statement': s['statement'],
+            })
+    columns = ['fingerprint', 'db', 'kind', 'calls', 'errors', 'total_sec', 'p50_sec', 'p95_sec',
+        'p99_sec', 'max_sec', 'rows', 'bytes', 'pool_wait_sec', 'statement']
+    return pd.DataFrame(rows, columns=columns).sort_values('total_sec', ascending=False, ignore_index=True)
+
+
+def reset_sql_stats():
+    """Clear all recorded statistics."""
+    with _LOCK:
+        _SUMMARY.clear()
+        _PENDING.clear()
+
+
+def flush_sql_stats(path: str=None, table: str=None, db: str='INFO_DATABASE') -> int:
+    """
+    Write the individual records collected since the last flush to a
+    JSON-lines file and/or a monitoring table. Summaries are kept.
+    Records are only collected while a flusher is running or
+    keep_records is set (see configure_sql_stats). If a write fails,
+    the records are put back for the next flush.
+
+    :param path: Local JSON-lines file to append to.
+    :type path: str
+    :param table: SQL table to append to, e.g. 'dbo.sqlMonitor'.
+    :type table: str
+    :param db: The database secret key for the table.
+    :type db: str
+    :return: number of records flushed
+    :rtype: int
+    """
+    with _LOCK:
+        records = list(_PENDING)
+        _PENDING.clear()
+    if not records:
+        return 0
+    try:
+        if path:
+            with open(path, 'a') as f:
+                for record in records:
+                    f.write(json.dumps(record, default=str) + '\n')
+        if table:
+            # Imported here to avoid a circular import with davinci.services.sql
+            from davinci.services.sql import _get_sql_engine
+            df = pd.DataFrame(records)
+            df['statistics'] = df['statistics'].astype(str)
+            schema, _, name = table.rpartition('.')
+            df.to_sql(name=name, schema=schema or None, con=_get_sql_engine(db), if_exists='append', index=False)
+    except Exception:
+        with _LOCK:
+            _PENDING.extendleft(reversed(records))
+        raise
+    return len(records)
+
+
+def start_sql_stats_flusher(interval_sec: float=300, **flush_kwargs):
+    """
+    Flush statistics on a background daemon thread every interval_sec,
+    and once more at process exit.
+
+    :param interval_sec: Seconds between flushes.
+    :type interval_sec: float
+    :param flush_kwargs: kwargs passed to flush_sql_stats
+    :type flush_kwargs: dict
+    """
+    stop_sql_stats_flusher()
+    stop = threading.Event()
+
+    def _run():
+        while not stop.wait(interval_sec):
+            try:
+                flush_sql_stats(**flush_kwargs)
+            except Exception as e:
+                logger.warning(f'Could not flush SQL stats: {e}')
+
+    thread = threading.Thread(target=_run, name='davinci-sql-stats', daemon=True)
+    thread.start()
+    _FLUSHER['thread'], _FLUSHER['stop'], _FLUSHER['kwargs'] = thread, stop, flush_kwargs
+
+
+def stop_sql_stats_flusher():
+    """
+    Stop the background flusher if one is running. Records collected
+    so far are left for flush_sql_stats; no more are buffered unless
+    keep_records is set.
+    """
+    if _FLUSHER['stop'] is not None:
+        _FLUSHER['stop'].set()
+    _FLUSHER['thread'], _FLUSHER['stop'], _FLUSHER['kwargs'] = None, None, None
+
+
+@atexit.register
+def _flush_at_exit():
+    if _FLUSHER['kwargs'] is not None:
+        try:
+            flush_sql_stats(**_FLUSHER['kwargs'])
+        except Exception as e:
+            logger.warning(f'Could not flush SQL stats at exit: {e}')
+
+
+def _read_with_statistics(conn, stmt):
+    """
+    Execute a query on a pyodbc connection with SET STATISTICS IO/TIME ON
+    and return the result alongside the server's informational messages.
+
+    :return: (DataFrame, list of message strings)
+    """
+    cursor = conn.cursor()
+    cursor.execute("SET STATISTICS IO ON; SET STATISTICS TIME ON;")
+    cursor.execute(stmt)
+    messages = [m[1] for m in cursor.messages]
+    while cursor.description is None and cursor.nextset():
+        messages += [m[1] for m in cursor.messages]
+    columns = [c[0] for c in cursor.description] if cursor.description else []
+    rows = cursor.fetchall() if cursor.description else []
+    while cursor.nextset():
+        messages += [m[1] for m in cursor.messages]
+    cursor.execute("SET STATISTICS IO OFF; SET STATISTICS TIME OFF;")
+    cursor.close()
+    return pd.DataFrame.from_records([tuple(r) for r in rows], columns=columns), messages
@@ -7,6 +7,7 @@ import sqlalchemy as sa
 from sqlalchemy.engine import URL
 from sqlalchemy import create_engine
 from davinci.services.auth import get_secret
+from davinci.utils.tracing import traced
 
 # Weather-related functions to get forecasts or history for given locations or routes
 
@@ -295,6 +296,7 @@ def getWeatherAlongLanes(df,travel_id_field,origin_zipcode_field,origin_date_fie
 
     return df_aggregate
 
+@traced('weather.zip_latlong_bulk')
 def _zip_latlong_bulk(zip_length):
 
     """
@@ -413,6 +415,7 @@ def _getGridAlongRoute(row,tolerance=1):
     return segment_df
 
 
+@traced('weather.get_grid_bulk')
 def _get_grid_bulk():
 
     """ Returns a df with list of weather grid, with lat and long
@@ -429,6 +432,7 @@ def _get_grid_bulk():
 
     return grid_df
 
+@traced('weather.get_Kenco_calendar_bulk')
 def _get_Kenco_calendar_bulk():
 
     """ Returns a df with list of Kenco grid, with lat and long
@@ -449,6 +453,7 @@ def _get_Kenco_calendar_bulk():
 
     return cal_df
 
+@traced('weather.get_weather_bulk')
 def _get_weather_bulk():
 
     """ Returns a df with list of weather grid, with lat and long
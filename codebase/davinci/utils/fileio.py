@@ -3,7 +3,7 @@ import pickle
 
 from davinci.utils.logging import log
 
-@log()
+@log(slow_sec=0.5)
 def force_folder_to_path(path):
     """Build folder path if it doesn't exist. Input
     assumes a full-path to a file, not a folder path itself.
@@ -1,15 +1,26 @@
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
 import logging
+import logging.handlers
 import functools
 import inspect
 import platform
 import time
 import datetime
+import itertools
+from collections.abc import Iterator, Mapping, Sized, Iterable
 from typing import Tuple
 
 from pandas import Series, DataFrame
 from numpy import ndarray
 
 from .utils import _full_stack
+from .metrics import _record_call, _CONFIG as _METRICS
+from .profiling import profile_run, _CONFIG as _PROFILING
 from .global_config import PROD
 
 # creating logger instance
@@ -35,6 +46,13 @@ logger.setLevel(logging.DEBUG)
 
 _DO_NOT_DISPLAY = {Series, DataFrame, ndarray, Tuple}
 _MAX_MSG_SIZE = 400
+_MAX_ITEMS = 5
+_MAX_DEPTH = 2
+_BRACKETS = {list: '[]', tuple: '()', dict: '{}', set: '{}'}
+
+_TRACK = 'file: %s, line: %s, function: %s -- '
+_SPLIT_ON = "\\" if platform.system() == 'Windows' else "/"
+_FILE_NAMES = {}
 
 
 def _truncate_repr(x):
@@ -50,18 +68,147 @@ def _truncate_repr(x):
         res = res[:_MAX_MSG_SIZE] + ' ...'
     return res
 
-def log(unveil=False, use=PROD):
+def _summarize(x, depth=0):
+    """
+    Bounded description of a value for the log: shape for frames
+    and arrays, length plus the first few items for containers.
+    Items are summarized the same way, down to _MAX_DEPTH levels,
+    so the cost never depends on the size of the value.
+    One-shot iterators such as generators are never consumed.
+    """
+    if type(x) in _DO_NOT_DISPLAY or isinstance(x, (str, bytes)):
+        return _truncate_repr(x)
+    if isinstance(x, Iterator):
+        return f"***{x.__class__.__name__} (not consumed) ***"
+    if isinstance(x, Sized) and isinstance(x, Iterable):
+        n = len(x)
+        if n == 0:
+            return _truncate_repr(x)
+        if depth >= _MAX_DEPTH:
+            return f"***{x.__class__.__name__} of length {n} ***"
+        if isinstance(x, Mapping):
+            head = ', '.join(f'{_summarize(k, depth + 1)}: {_summarize(v, depth + 1)}'
+                for k, v in itertools.islice(x.items(), _MAX_ITEMS))
+        else:
+            head = ', '.join(_summarize(i, depth + 1) for i in itertools.islice(x, _MAX_ITEMS))
+        if n <= _MAX_ITEMS and type(x) in _BRACKETS:
+            opening, closing = _BRACKETS[type(x)]
+            res = opening + head + (',' if type(x) is tuple and n == 1 else '') + closing
+        else:
+            more = ', ...' if n > _MAX_ITEMS else ''
+            res = f"***{x.__class__.__name__} of length {n}: {head}{more} ***"
+        return res[:_MAX_MSG_SIZE] + ' ...' if len(res) > _MAX_MSG_SIZE else res
+    return _truncate_repr(x)
+
+def _caller():
+    """
+    File name and line of the code calling a decorated function.
+    Only reads the one frame needed, instead of building the whole
+    stack with source context as inspect.getouterframes does.
+    """
+    try:
+        frame = sys._getframe(2)
+    except ValueError:
+        return '?', 0
+    path = frame.f_code.co_filename
+    file = _FILE_NAMES.get(path)
+    if file is None:
+        file = _FILE_NAMES[path] = path.split(_SPLIT_ON)[-1]
+    return file, frame.f_lineno
+
+def _log_error(where, e):
+    if where is not None:
+        logger.info('ERROR!!! Occurred in ' + _TRACK, *where)
+    logger.info('Full Stack Trace')
+    logger.info('%s', _full_stack())
+    logger.info('Quick Info: %s', e)
+
+_SUMMARY_INTERVAL_SEC = 60
+_SAMPLERS = []
+
+
+class _Sampler:
+    """
+    Decides which calls of one decorated function get logged, and
+    counts the rest so they can be summarized instead. Counters are
+    not locked; under heavy threading the counts are approximate.
+    """
+    def __init__(self, name, sample, per_minute, slow_sec):
+        self.name = name
+        self.sample = sample
+        self.per_minute = per_minute
+        self.slow_sec = slow_sec
+        self.calls = 0
+        self.window_start = time.monotonic()
+        self.window_calls = 0
+        self.suppressed = 0
+        self.last_summary = self.window_start
+        _SAMPLERS.append(self)
+
+    def admit(self):
+        """Whether this call passes the 1-in-N and per-minute limits."""
+        self.calls += 1
+        if self.sample and (self.calls - 1) % self.sample:
+            return False
+        if self.per_minute:
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start, self.window_calls = now, 0
+            self.window_calls += 1
+            if self.window_calls > self.per_minute:
+                return False
+        return True
+
+    def suppress(self):
+        self.suppressed += 1
+        if time.monotonic() - self.last_summary >= _SUMMARY_INTERVAL_SEC:
+            self.summarize()
+
+    def summarize(self):
+        now = time.monotonic()
+        if self.suppressed:
+            logger.info('function: %s -- %s calls not logged in the last %ss.',
+                self.name, self.suppressed, round(now - self.last_summary))
+        self.suppressed, self.last_summary = 0, now
+
+
+@atexit.register
+def _summarize_suppressed():
+    for sampler in _SAMPLERS:
+        sampler.summarize()
+
+
+def log(unveil=False, use=PROD, sample=None, per_minute=None, slow_sec=None):
     """
     The log decorator to easily log function behaviors
     and runtimes.
 
     :param unveil: Reveal info about params and return.
         Can potentially reveal secret info, so keep this in mind
-        when deciding to use this.
+        when deciding to use this. Containers are summarized by
+        length and first items, and generators are never consumed.
     :type unveil: bool
     :param use: Turn the logger on. Defaults to
         True in linux environment, and False otherwise.
+        When off, the wrapper only adds a try/except.
     :type use: bool
+    :param sample: Log only 1 in every sample calls.
+    :type sample: int
+    :param per_minute: Log at most this many calls per minute.
+    :type per_minute: int
+    :param slow_sec: Log only calls that take at least this long,
+        with a single line after the call returns. Combined with
+        sample or per_minute, calls they admit are logged too, and
+        slow calls are logged even past those limits.
+    :type slow_sec: float
+
+    A function named main can also be profiled for peak memory,
+    CPU and I/O, whatever use and the log level are; see
+    davinci.utils.profiling.
+
+    Errors are always logged. Calls skipped by sample, per_minute
+    or slow_sec are counted and summarized in one line at most
+    once a minute, and at process exit. None of these apply to main.
 
     Example usage:
 
@@ -77,63 +224,233 @@ def log(unveil=False, use=PROD):
         def bar(private_x):
             ...
 
+        # Called in a tight loop: log the first 10 calls a minute,
+        # plus any call slower than half a second.
+        @log(per_minute=10, slow_sec=0.5)
+        def baz(key):
+            ...
+
+        # Only log calls slower than half a second.
+        @log(slow_sec=0.5)
+        def qux(key):
+            ...
+
     """
     
     def _wrapper(f):
+        name = f.__name__
+        is_main = name.lower() == 'main'
+        metric_name = f'{f.__module__}.{f.__qualname__}'
+        sampler = None if is_main or not (sample or per_minute or slow_sec) else \
+            _Sampler(name, sample, per_minute, slow_sec)
+        # main is always logged in full, so slow_sec never applies to it.
+        slow_only = sampler.slow_sec if sampler is not None else None
+        limited = bool(sample or per_minute)
+
+        def _profiled(*args, **kwargs):
+            if _PROFILING['enabled']:
+                with profile_run(metric_name):
+                    return f(*args, **kwargs)
+            return f(*args, **kwargs)
+        # Only main pays for the profiling check.
+        call = _profiled if is_main else f
+
+        if not use:
+            @functools.wraps(f)
+            def _func(*args, **kwargs):
+                try:
+                    return call(*args, **kwargs)
+                except Exception as e:
+                    _log_error(None, e)
+                    raise
+            return _func
+
         @functools.wraps(f)
         def _func(*args, **kwargs):
-            if use:
-                start = time.time()
-                start_datetime = datetime.datetime.now().strftime('%m-%d-%Y, @ %H:%M:%S')
+            if not logger.isEnabledFor(logging.INFO):
+                if not _METRICS['enabled']:
+                    return call(*args, **kwargs)
+                start = time.perf_counter()
                 try:
-                    frame = inspect.currentframe()
-                    try:
-                        outer_frame = inspect.getouterframes(frame)[1]
-                    except IndexError as e:
-                        logger.warn(f'issue getting outer frame info. {e}')
-                    split_on = "\\" if platform.system() == 'Windows' else "/"
-                    file = outer_frame.filename.split(split_on)[-1]
-                    line = outer_frame.lineno
-                    track = 'file: {}, line: {}, function: {} -- '.format(file, line, f.__name__)
-                    logger.info(track)
-                    logger.info(track + 'entering function.')
+                    res = call(*args, **kwargs)
+                except Exception:
+                    _record_call(metric_name, time.perf_counter() - start, True)
+                    raise
+                _record_call(metric_name, time.perf_counter() - start, False)
+                return res
+            start = time.perf_counter()
+            start_datetime = datetime.datetime.now().strftime('%m-%d-%Y, @ %H:%M:%S') if is_main else None
+            verbose = sampler is None or sampler.admit()
+            file, line = '?', 0
+            try:
+                file, line = _caller()
+                # With slow_sec, nothing is logged until the runtime is known.
+                if verbose and not slow_only:
+                    logger.info(_TRACK, file, line, name)
+                    logger.info(_TRACK + 'entering function.', file, line, name)
                     if unveil:
                         params = inspect.getcallargs(f, *args, **kwargs)
-                        trunc_params = {param: _truncate_repr(params[param]) for param in params}
-                        logger.info(track + f'called with {trunc_params}')
-                except Exception as e:
-                    logger.info('ERROR IN LOGGING!')
-                    logger.info(track + str(e))
+                        trunc_params = {param: _summarize(params[param]) for param in params}
+                        logger.info(_TRACK + 'called with %s', file, line, name, trunc_params)
+            except Exception as e:
+                logger.info('ERROR IN LOGGING!')
+                logger.info(_TRACK + '%s', file, line, name, e)
 
             # Make sure the function always executes independent of logging
             try:
-                res = f(*args, **kwargs)
+                res = call(*args, **kwargs)
             except Exception as e:
-                if use:
-                    logger.info('ERROR!!! Occurred in ' + track)
-                logger.info('Full Stack Trace')	
-                logger.info(_full_stack())
-                logger.info('Quick Info: ' + str(e))
-                raise e
-            if use:
-                try:
-                    if unveil:
-                        if hasattr(res, '__iter__') and type(res) != DataFrame:
-                            for i in res:
-                                res_i = _truncate_repr(i)
-                                logger.info(track + f'returned {res_i}')
-                        else:
-                            logger.info(track + f'returned {_truncate_repr(res)}')
-                    if f.__name__.lower() == 'main':
-                        logger.info('TOTAL RUNTIME: ' + str(round(time.time() - start, 2)) + 's')
-                        end_datetime = datetime.datetime.now().strftime('%m-%d-%Y, @ %H:%M:%S')
-                        logger.info(f'Script Start: {start_datetime} >>> Script End: {end_datetime}')
-                    else:
-                        logger.info(track + 'exitting function, total time ' + str(round(time.time() - start, 2)) + 's')
-                except Exception as e:
-                    logger.info('ERROR IN LOGGING!')
-                    logger.info(track + str(e))
+                elapsed = time.perf_counter() - start
+                if _METRICS['enabled']:
+                    _record_call(metric_name, elapsed, True)
+                _log_error((file, line, name), e)
+                raise
+            elapsed = time.perf_counter() - start
+            if _METRICS['enabled']:
+                _record_call(metric_name, elapsed, False)
+            if slow_only:
+                # Slow calls bypass the sample/per_minute limits.
+                verbose = elapsed >= slow_only or (verbose and limited)
+            if not verbose:
+                sampler.suppress()
+                return res
+            try:
+                if unveil:
+                    logger.info(_TRACK + 'returned %s', file, line, name, _summarize(res))
+                if is_main:
+                    logger.info('TOTAL RUNTIME: %ss', round(elapsed, 2))
+                    end_datetime = datetime.datetime.now().strftime('%m-%d-%Y, @ %H:%M:%S')
+                    logger.info('Script Start: %s >>> Script End: %s', start_datetime, end_datetime)
+                else:
+                    logger.info(_TRACK + 'exitting function, total time %ss', file, line, name, round(elapsed, 2))
+            except Exception as e:
+                logger.info('ERROR IN LOGGING!')
+                logger.info(_TRACK + '%s', file, line, name, e)
             return res
 
         return _func
     return _wrapper
+
+
+_QUEUE_LOGGING = {'listener': None, 'handler': None, 'root_handlers': None, 'formatters': None, 'dropped': 0}
+
+
+class _JsonFormatter(logging.Formatter):
+    """One JSON object per record, for CloudWatch and other structured sinks."""
+    def format(self, record):
+        payload = {
+            'ts': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: on a full queue it drops a record."""
+    def __init__(self, log_queue, overflow):
+        super().__init__(log_queue)
+        self.overflow = overflow
+
+    def prepare(self, record):
+        # QueueHandler.prepare folds the traceback into the message and
+        # drops exc_info. Keep it apart in exc_text, which every formatter
+        # still appends, so the JSON formatter can put it in its own field.
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if self.overflow == 'drop_oldest':
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass
+        _QUEUE_LOGGING['dropped'] += 1
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Block rather than fail on a full queue; the listener is draining it.
+        self.queue.put(self._sentinel)
+
+
+def enable_queue_logging(max_size: int=10000, overflow: str='drop_newest', json_format: bool=False):
+    """
+    Ship log records through a bounded in-memory queue. The calling
+    thread only enqueues; a background listener formats and writes
+    records to the handlers configured so far. Queued records are
+    flushed at process exit. Can also be turned on by setting the
+    DAVINCI_LOG_QUEUE environment variable (DAVINCI_LOG_JSON=1 for JSON).
+
+    :param max_size: Max records buffered before the overflow policy applies.
+    :type max_size: int
+    :param overflow: 'drop_newest' discards incoming records when the
+        queue is full, 'drop_oldest' discards the oldest queued record.
+    :type overflow: str
+    :param json_format: Write records as JSON lines instead of plain text.
+    :type json_format: bool
+
+    Example usage:
+
+    .. code-block:: python
+
+        from davinci.utils.logging import enable_queue_logging
+
+        enable_queue_logging(max_size=50000, json_format=True)
+
+    """
+    if overflow not in ('drop_newest', 'drop_oldest'):
+        raise ValueError("overflow must be 'drop_newest' or 'drop_oldest'")
+    disable_queue_logging()
+    root = logging.getLogger()
+    root_handlers = list(root.handlers)
+    formatters = [(handler, handler.formatter) for handler in root_handlers]
+    if json_format:
+        for handler in root_handlers:
+            handler.setFormatter(_JsonFormatter())
+    log_queue = queue.Queue(maxsize=max_size)
+    handler = _BoundedQueueHandler(log_queue, overflow)
+    listener = _DrainingQueueListener(log_queue, *root_handlers, respect_handler_level=True)
+    root.handlers = [handler]
+    listener.start()
+    _QUEUE_LOGGING.update(listener=listener, handler=handler, root_handlers=root_handlers, formatters=formatters,
+        dropped=0)
+
+
+@atexit.register
+def disable_queue_logging():
+    """
+    Flush queued records and write directly to the original handlers,
+    with their original formatters, again. Registered to run at process exit.
+    """
+    listener = _QUEUE_LOGGING['listener']
+    if listener is None:
+        return
+    listener.stop()
+    logging.getLogger().handlers = _QUEUE_LOGGING['root_handlers']
+    for handler, formatter in _QUEUE_LOGGING['formatters']:
+        handler.setFormatter(formatter)
+    dropped = _QUEUE_LOGGING['dropped']
+    _QUEUE_LOGGING.update(listener=None, handler=None, root_handlers=None, formatters=None, dropped=0)
+    if dropped:
+        logger.warning('Log queue was full; dropped %s records.', dropped)
+
+
+if os.environ.get('DAVINCI_LOG_QUEUE'):
+    enable_queue_logging(json_format=bool(os.environ.get('DAVINCI_LOG_JSON')))
@@ -0,0 +1,154 @@
+"""In-process timing metrics for functions decorated with @log().
+Every call is recorded with its wall time and whether it raised, so hot
+or regressing functions in a flow show up without an external APM.
+
+Example usage:
+
+.. code-block:: python
+
+    from davinci.utils import metrics
+
+    main()
+    print(metrics.get_metrics())
+
+    # Log a summary table at exit and append it to a monitor table
+    metrics.configure_metrics(summary_at_exit=True, table='functionMonitor')
+
+"""
+
+import atexit
+import platform
+import threading
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .global_config import PROD
+
+_CONFIG = {
+    'enabled': True,
+    'max_samples': 2000,
+    'summary_at_exit': False,
+    'table': None,
+    'db': 'INFO_DATABASE',
+}
+
+_LOCK = threading.Lock()
+_REGISTRY = {}
+
+
+def configure_metrics(enabled: bool=True, max_samples: int=2000, summary_at_exit: bool=False,
+        table: str=None, db: str='INFO_DATABASE'):
+    """
+    Configure function timing metrics.
+
+    :param enabled: Record timings for @log() decorated calls.
+        Functions decorated with use=False are never timed.
+    :type enabled: bool
+    :param max_samples: Wall times kept per function for percentiles.
+    :type max_samples: int
+    :param summary_at_exit: Log the summary table at process exit.
+    :type summary_at_exit: bool
+    :param table: SQL table to append the summary to at process exit,
+        e.g. 'functionMonitor'.
+    :type table: str
+    :param db: The database secret key for the table.
+    :type db: str
+    """
+    _CONFIG.update(enabled=enabled, max_samples=max_samples, summary_at_exit=summary_at_exit,
+        table=table, db=db)
+
+
+def _record_call(name, wall_sec, error):
+    with _LOCK:
+        entry = _REGISTRY.get(name)
+        if entry is None:
+            entry = _REGISTRY[name] = {'calls': 0, 'errors': 0, 'total_sec': 0.0,
+                'wall': deque(maxlen=_CONFIG['max_samples'])}
+        entry['calls'] += 1
+        entry['errors'] += error
+        entry['total_sec'] += wall_sec
+        entry['wall'].append(wall_sec)
+
+
+def get_metrics() -> pd.DataFrame:
+    """
+    Summarize recorded calls, one row per function, sorted by total time.
+
+    :return: DataFrame with call and error counts, total time and
+        p50/p95/p99/max wall time
+    :rtype: pd.DataFrame
+    """
+    with _LOCK:
+        rows = []
+        for name, entry in _REGISTRY.items():
+            wall = np.fromiter(entry['wall'], dtype=float)
+            p50, p95, p99 = np.percentile(wall, [50, 95, 99]) if len(wall) else (np.nan,) * 3
+            rows.append({
+                'FunctionName': name, 'calls': entry['calls'], 'errors': entry['errors'],
+                'total_sec': entry['total_sec'], 'p50_sec': p50, 'p95_sec': p95, 'p99_sec': p99,
+                'max_sec': wall.max() if len(wall) else np.nan,
+            })
+    columns = ['FunctionName', 'calls', 'errors', 'total_sec', 'p50_sec', 'p95_sec', 'p99_sec', 'max_sec']
+    return pd.DataFrame(rows, columns=columns).sort_values('total_sec', ascending=False, ignore_index=True)
+
+
+def reset_metrics():
+    """Clear all recorded timings."""
+    with _LOCK:
+        _REGISTRY.clear()
+
+
+def log_metrics_summary(top: int=25):
+    """
+    Log the summary table.
+
+    :param top: Number of functions to include, by total time.
+    :type top: int
+    """
+    # Imported here to avoid a circular import with davinci.utils.logging
+    from davinci.utils.logging import logger
+    df = get_metrics().head(top)
+    if len(df):
+        logger.info('Function timings:\n%s', df.to_string(index=False, float_format=lambda x: f'{x:.4f}'))
+
+
+def write_metrics(table: str='functionMonitor', db: str='INFO_DATABASE', job_name: str=None) -> int:
+    """
+    Append the summary to a monitoring table, alongside the
+    cronMonitor and modelMonitor tables.
+
+    :param table: SQL table to append to.
+    :type table: str
+    :param db: The database secret key for the table.
+    :type db: str
+    :param job_name: Name of the flow or script, stored with each row.
+    :type job_name: str
+    :return: number of rows written
+    :rtype: int
+    """
+    # Imported here to avoid a circular import with davinci.services.sql
+    from davinci.services.sql import write_df_to_table
+    df = get_metrics()
+    if not len(df):
+        return 0
+    df.insert(0, 'Date', datetime.now())
+    df.insert(1, 'JobName', job_name)
+    df.insert(2, 'Host', platform.node())
+    df['Env'] = 'PROD' if PROD else 'DEV'
+    write_df_to_table(df, table, db=db)
+    return len(df)
+
+
+@atexit.register
+def _report_at_exit():
+    if _CONFIG['summary_at_exit']:
+        log_metrics_summary()
+    if _CONFIG['table']:
+        try:
+            write_metrics(_CONFIG['table'], db=_CONFIG['db'])
+        except Exception as e:
+            from davinci.utils.logging import logger
+            logger.warning(f'Could not write function metrics: {e}')
@@ -0,0 +1,212 @@
+"""Opt-in resource profiling for flow entry points. When enabled, a
+function named main that is decorated with @log() is profiled, and so
+is any block wrapped in profile_run. The report has peak RSS, CPU time,
+I/O bytes, the tracemalloc peak and the largest allocation sites still
+live at the end and, optionally, a
+cProfile dump. It is written as JSON locally and/or to S3, so ECS task
+cpu/memory settings can be sized from measured runs.
+
+Profiling is enabled with configure_profiling, or by setting the
+DAVINCI_PROFILE environment variable.
+
+Example usage:
+
+.. code-block:: python
+
+    from davinci.utils.logging import log
+    from davinci.utils.profiling import configure_profiling
+
+    configure_profiling(cprofile=True, s3_prefix='dev/profiles/fte_estimation')
+
+    @log()
+    def main():
+        ...
+
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import shutil
+import pstats
+import cProfile
+import tempfile
+import platform
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_CONFIG = {
+    'enabled': bool(os.environ.get('DAVINCI_PROFILE')),
+    'tracemalloc': True,
+    'cprofile': False,
+    'top': 10,
+    'out_dir': os.environ.get('DAVINCI_PROFILE_DIR', '.'),
+    's3_prefix': os.environ.get('DAVINCI_PROFILE_S3_PREFIX'),
+}
+
+_FARGATE_CPU = [256, 512, 1024, 2048, 4096]
+_FARGATE_MEMORY = {
+    256: [512, 1024, 2048],
+    512: [1024 * i for i in range(1, 5)],
+    1024: [1024 * i for i in range(2, 9)],
+    2048: [1024 * i for i in range(4, 17)],
+    4096: [1024 * i for i in range(8, 31)],
+}
+
+
+def configure_profiling(enabled: bool=True, tracemalloc: bool=True, cprofile: bool=False, top: int=10,
+        out_dir: str='.', s3_prefix: str=None):
+    """
+    Configure profiling of main entry points.
+
+    :param enabled: Profile functions named main decorated with @log().
+    :type enabled: bool
+    :param tracemalloc: Trace Python allocations. Slows allocation-heavy
+        code noticeably, but gives the top allocation sites.
+    :type tracemalloc: bool
+    :param cprofile: Also run cProfile and save the pstats dump.
+    :type cprofile: bool
+    :param top: Number of allocation sites and functions in the report.
+    :type top: int
+    :param out_dir: Local folder for reports. None to only upload to S3.
+    :type out_dir: str
+    :param s3_prefix: S3 folder to upload reports to.
+    :type s3_prefix: str
+    """
+    _CONFIG.update(enabled=enabled, tracemalloc=tracemalloc, cprofile=cprofile, top=top,
+        out_dir=out_dir, s3_prefix=s3_prefix)
+
+
+def _rusage():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF)
+
+
+def _peak_rss_mb(usage):
+    if usage is None:
+        return None
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    scale = 1 if platform.system() == 'Darwin' else 1024
+    return round(usage.ru_maxrss * scale / 1024 ** 2, 1)
+
+
+def _io_counters():
+    """Bytes read/written by this process, from /proc on Linux."""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            return {k: int(v) for k, v in (line.split(':') for line in f)}
+    except (OSError, ValueError):
+        return None
+
+
+def _suggest_task_size(cpu_sec, wall_sec, peak_rss_mb):
+    """Smallest Fargate cpu/memory pair covering the measured CPU use and peak RSS plus 25%."""
+    if not wall_sec or peak_rss_mb is None:
+        return None
+    vcpu_units = 1024 * cpu_sec / wall_sec
+    cpu = next((c for c in _FARGATE_CPU if c >= vcpu_units), _FARGATE_CPU[-1])
+    needed_mb = peak_rss_mb * 1.25
+    for c in _FARGATE_CPU[_FARGATE_CPU.index(cpu):]:
+        memory = next((m for m in _FARGATE_MEMORY[c] if m >= needed_mb), None)
+        if memory is not None:
+            return {'cpu': c, 'memory': memory}
+    return {'cpu': _FARGATE_CPU[-1], 'memory': _FARGATE_MEMORY[_FARGATE_CPU[-1]][-1]}
+
+
+def _write_report(report, profiler):
+    """Write the report (and pstats dump) locally and/or to S3, returning where it went."""
+    stem = f"{report['name']}_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    out_dir = _CONFIG['out_dir'] or tempfile.mkdtemp()
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [os.path.join(out_dir, stem + '.json')]
+    with open(paths[0], 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    if profiler is not None:
+        paths.append(os.path.join(out_dir, stem + '.prof'))
+        profiler.dump_stats(paths[1])
+    written = list(paths) if _CONFIG['out_dir'] else []
+    try:
+        if _CONFIG['s3_prefix']:
+            # Imported here so profiling does not pull in the services layer
+            from davinci.services.s3 import upload_file
+            for path in paths:
+                s3_path = f"{_CONFIG['s3_prefix'].rstrip('/')}/{os.path.basename(path)}"
+                upload_file(path, s3_path)
+                written.append(s3_path)
+    finally:
+        if not _CONFIG['out_dir']:
+            shutil.rmtree(out_dir, ignore_errors=True)
+    return written
+
+
+@contextmanager
+def profile_run(name: str='main'):
+    """
+    Profile a block of code and write a report when it exits,
+    whether or not it raised.
+
+    :param name: Name used in the report and its file names.
+    :type name: str
+    :return: dict that is filled in with the report on exit
+    """
+    # Imported here to avoid a circular import with davinci.utils.logging
+    from davinci.utils.logging import logger
+    report = {'name': name}
+    started_tracemalloc = _CONFIG['tracemalloc'] and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if _CONFIG['cprofile'] else None
+    usage_start, io_start = _rusage(), _io_counters()
+    start, start_dt = time.perf_counter(), datetime.now()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield report
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall = time.perf_counter() - start
+        usage_end, io_end = _rusage(), _io_counters()
+        report.update(start=start_dt.isoformat(timespec='seconds'), wall_sec=round(wall, 3),
+            host=platform.node(), python=sys.version.split()[0])
+        if usage_end is not None:
+            user = usage_end.ru_utime - usage_start.ru_utime
+            system = usage_end.ru_stime - usage_start.ru_stime
+            report.update(cpu_user_sec=round(user, 3), cpu_sys_sec=round(system, 3),
+                cpu_util=round((user + system) / wall, 3) if wall else None,
+                peak_rss_mb=_peak_rss_mb(usage_end))
+            report['suggested_task'] = _suggest_task_size(user + system, wall, report['peak_rss_mb'])
+        if io_end is not None and io_start is not None:
+            report['io'] = {k: io_end[k] - io_start.get(k, 0) for k in
+                ('rchar', 'wchar', 'read_bytes', 'write_bytes') if k in io_end}
+        if tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            report['tracemalloc_peak_mb'] = round(peak / 1024 ** 2, 1)
+            report['top_allocations'] = [
+                {'where': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:_CONFIG['top']]
+            ]
+            if started_tracemalloc:
+                tracemalloc.stop()
+        if profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(_CONFIG['top'])
+            report['cprofile_top'] = out.getvalue()
+        logger.info('PROFILE %s: wall %ss, cpu %ss user / %ss sys, peak RSS %s MB, io %s, suggested task %s',
+            name, report['wall_sec'], report.get('cpu_user_sec'), report.get('cpu_sys_sec'),
+            report.get('peak_rss_mb'), report.get('io'), report.get('suggested_task'))
+        try:
+            for path in _write_report(report, profiler):
+                logger.info('PROFILE report written to %s', path)
+        except Exception as e:
+            logger.warning(f'Could not write profile report: {e}')
@@ -0,0 +1,257 @@
+"""Lightweight tracing spans, to see how time in a flow splits between
+SQL, S3, Doppler and pandas work. Spans nest, carry attributes, and are
+written to a local file in the Chrome trace event format, which loads
+directly in chrome://tracing or https://ui.perfetto.dev without a
+collector service. The file holds one event per line.
+
+Tracing is off by default. Turn it on with configure_tracing, or by
+setting the DAVINCI_TRACE_FILE environment variable to the output path.
+When off, spans cost a single dict lookup.
+
+Example usage:
+
+.. code-block:: python
+
+    from concurrent.futures import ThreadPoolExecutor
+    from davinci.utils.tracing import configure_tracing, span, traced, map_in_context
+
+    configure_tracing('flow_trace.json')
+
+    @traced('features.build', capture=('site',))
+    def build_features(df, site):
+        ...
+
+    with span('forecast', site='ATL') as s:
+        df = get_sql(stmt)
+        s.set(rows=len(df))
+
+    # Worker threads do not inherit the current span; submit through
+    # submit_in_context / map_in_context to keep them nested.
+    with ThreadPoolExecutor() as executor:
+        frames = list(map_in_context(executor, build_features, sites))
+
+"""
+
+import os
+import json
+import time
+import atexit
+import inspect
+import functools
+import itertools
+import threading
+from contextvars import ContextVar, copy_context
+
+_CONFIG = {
+    'enabled': False,
+    'path': None,
+    'buffer_size': 1000,
+}
+
+_LOCK = threading.Lock()
+_EVENTS = []
+_IDS = itertools.count(1)
+_CURRENT = ContextVar('davinci_span', default=None)
+
+
+class Span:
+    """
+    One timed operation. Create spans with span() or @traced
+    rather than directly.
+    """
+    __slots__ = ('name', 'category', 'attributes', 'span_id', 'parent_id', '_start_us', '_start', '_token')
+
+    def __init__(self, name, category, attributes):
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.span_id = next(_IDS)
+        parent = _CURRENT.get()
+        self.parent_id = parent.span_id if parent is not None else None
+
+    def set(self, **attributes):
+        """Add attributes to the span, e.g. row counts known only at the end."""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self._token = _CURRENT.set(self)
+        self._start_us = time.time_ns() // 1000
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration_us = (time.perf_counter() - self._start) * 1e6
+        _CURRENT.reset(self._token)
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        args = {k: v if isinstance(v, (int, float, bool, str, type(None))) else str(v)
+            for k, v in self.attributes.items()}
+        args['span_id'], args['parent_id'] = self.span_id, self.parent_id
+        _add_event({
+            'name': self.name, 'cat': self.category, 'ph': 'X',
+            'ts': self._start_us, 'dur': round(duration_us, 1),
+            'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args,
+        })
+        return False
+
+
+class _NullSpan:
+    """Stand-in returned while tracing is off."""
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def configure_tracing(path: str='trace.json', enabled: bool=True, buffer_size: int=1000):
+    """
+    Configure span export.
+
+    :param path: Local file spans are appended to.
+    :type path: str
+    :param enabled: Record spans.
+    :type enabled: bool
+    :param buffer_size: Spans buffered in memory between writes.
+        Remaining spans are written at process exit.
+    :type buffer_size: int
+    """
+    flush_spans()
+    _CONFIG.update(enabled=enabled, path=path, buffer_size=buffer_size)
+
+
+def span(name: str, category: str='davinci', **attributes):
+    """
+    Time a block of code as a span, nested under the current span.
+
+    :param name: Span name, e.g. 'sql.get_sql'.
+    :type name: str
+    :param category: Span category, shown as 'cat' in trace viewers.
+    :type category: str
+    :param attributes: Attributes recorded with the span.
+    :type attributes: dict
+    :return: context manager yielding the span
+    """
+    if not _CONFIG['enabled']:
+        return _NULL_SPAN
+    return Span(name, category, attributes)
+
+
+def current_span():
+    """
+    The innermost active span, for adding attributes from inside
+    a traced function. A no-op span when there is none.
+    """
+    return _CURRENT.get() or _NULL_SPAN
+
+
+def traced(name: str=None, category: str=None, capture=()):
+    """
+    Decorator recording each call of a function as a span.
+
+    :param name: Span name. Defaults to module.qualname.
+    :type name: str
+    :param category: Span category. Defaults to the last part of the module.
+    :type category: str
+    :param capture: Argument names recorded as span attributes.
+        Do not capture secrets.
+    :type capture: Iterable[str]
+
+    The row count of a returned DataFrame or array is recorded as 'rows'.
+    """
+    def _wrapper(f):
+        span_name = name or f'{f.__module__}.{f.__qualname__}'
+        span_category = category or f.__module__.rsplit('.', 1)[-1]
+        signature = inspect.signature(f) if capture else None
+
+        @functools.wraps(f)
+        def _func(*args, **kwargs):
+            if not _CONFIG['enabled']:
+                return f(*args, **kwargs)
+            attributes = {}
+            if signature is not None:
+                try:
+                    bound = signature.bind_partial(*args, **kwargs)
+                    bound.apply_defaults()
+                    attributes = {k: bound.arguments[k] for k in capture if k in bound.arguments}
+                except TypeError:
+                    pass
+            with Span(span_name, span_category, attributes) as s:
+                res = f(*args, **kwargs)
+                shape = getattr(res, 'shape', None)
+                if isinstance(shape, tuple) and shape:
+                    s.set(rows=shape[0])
+                return res
+        return _func
+    return _wrapper
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """
+    executor.submit, running fn in a copy of the caller's context, so
+    spans started in the worker thread nest under the current span.
+
+    :param executor: A concurrent.futures executor.
+    :type executor: concurrent.futures.Executor
+    :param fn: The callable to run.
+    :type fn: Callable
+    :return: concurrent.futures.Future
+    """
+    return executor.submit(copy_context().run, fn, *args, **kwargs)
+
+
+def map_in_context(executor, fn, *iterables):
+    """
+    executor.map with each call run in a copy of the caller's context.
+    Results are yielded in order.
+
+    :param executor: A concurrent.futures executor.
+    :type executor: concurrent.futures.Executor
+    :param fn: The callable to run.
+    :type fn: Callable
+    :return: iterator of results
+    """
+    # Submit eagerly like executor.map, so every context is copied here.
+    futures = [submit_in_context(executor, fn, *args) for args in zip(*iterables)]
+
+    def _results():
+        for future in futures:
+            yield future.result()
+    return _results()
+
+
+def _add_event(event):
+    with _LOCK:
+        _EVENTS.append(event)
+        full = len(_EVENTS) >= _CONFIG['buffer_size']
+    if full:
+        flush_spans()
+
+
+@atexit.register
+def flush_spans():
+    """Append buffered spans to the trace file."""
+    with _LOCK:
+        events = list(_EVENTS)
+        _EVENTS.clear()
+        path = _CONFIG['path']
+        if not events or not path:
+            return
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a') as f:
+            # The trace event format allows an unterminated array, so the
+            # file stays loadable while spans are still being appended.
+            if is_new:
+                f.write('[\n')
+            for event in events:
+                f.write(json.dumps(event, default=str) + ',\n')
+
+
+if os.environ.get('DAVINCI_TRACE_FILE'):
+    configure_tracing(os.environ['DAVINCI_TRACE_FILE'])
@@ -0,0 +1,100 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from davinci.services.sql import _cast_column, _sql_input_size
+
+
+def _col(data_type, length=None, precision=None, scale=None, datetime_precision=None):
+    return {
+        'COLUMN_NAME': 'x',
+        'DATA_TYPE': data_type,
+        'CHARACTER_MAXIMUM_LENGTH': length,
+        'NUMERIC_PRECISION': precision,
+        'NUMERIC_SCALE': scale,
+        'DATETIME_PRECISION': datetime_precision,
+    }
+
+
+def _cast(values, data_type, **kwargs):
+    return list(_cast_column(pd.Series(values, name='x'), _col(data_type, **kwargs)))
+
+
+def test_int_keeps_whole_values_and_nulls():
+    assert _cast([1, 2.0, None, '3'], 'int') == [1, 2, None, 3]
+
+
+def test_int_rejects_fractional_values():
+    with pytest.raises(ValueError):
+        _cast([1, 1.7], 'bigint')
+
+
+def test_int_rejects_unparseable_values():
+    with pytest.raises(ValueError):
+        _cast(['1', 'abc'], 'int')
+
+
+def test_decimal_is_exact_at_column_scale():
+    out = _cast([0.1, '2.005', None], 'decimal', precision=18, scale=2)
+    assert out == [Decimal('0.10'), Decimal('2.00'), None]
+    assert all(isinstance(v, Decimal) for v in out[:2])
+
+
+def test_float_keeps_nulls():
+    assert _cast([1.5, np.nan], 'float') == [1.5, None]
+
+
+def test_bit():
+    assert _cast([1, 0, None], 'bit') == [True, False, None]
+
+
+def test_date_and_datetime():
+    assert _cast(['2023-01-02', None], 'date') == [date(2023, 1, 2), None]
+    assert _cast([pd.Timestamp('2023-01-02 03:04:05')], 'datetime2') == [datetime(2023, 1, 2, 3, 4, 5)]
+
+
+def test_varchar_writes_whole_floats_without_decimal_point():
+    assert _cast([12345.0, 1.5, np.nan], 'varchar') == ['12345', '1.5', None]
+
+
+def test_varchar_keeps_strings():
+    assert _cast(['a', None, 'b'], 'nvarchar') == ['a', None, 'b']
+
+
+def test_varbinary_passes_bytes_through():
+    assert _cast([b'\x00\x01', bytearray(b'\x02'), None], 'varbinary') == [b'\x00\x01', b'\x02', None]
+
+
+def test_varbinary_rejects_text():
+    with pytest.raises(ValueError):
+        _cast(['abc'], 'varbinary')
+
+
+def test_time():
+    out = _cast(['08:30:00', timedelta(hours=1, minutes=2), time(23, 59), None], 'time')
+    assert out == [time(8, 30), time(1, 2), time(23, 59), None]
+
+
+def test_time_rejects_out_of_range_timedelta():
+    with pytest.raises(ValueError):
+        _cast([timedelta(days=1)], 'time')
+
+
+def test_unmapped_types_pass_through():
+    assert _cast(['<a/>', None], 'xml') == ['<a/>', None]
+
+
+def test_sql_input_sizes():
+    pyodbc = pytest.importorskip('pyodbc')
+    assert _sql_input_size(_col('int')) == (pyodbc.SQL_BIGINT, 0, 0)
+    assert _sql_input_size(_col('decimal', precision=18, scale=4)) == (pyodbc.SQL_DECIMAL, 18, 4)
+    assert _sql_input_size(_col('nvarchar', length=50)) == (pyodbc.SQL_WVARCHAR, 50, 0)
+    assert _sql_input_size(_col('nvarchar', length=-1)) == (pyodbc.SQL_WVARCHAR, 0, 0)
+    assert _sql_input_size(_col('varbinary', length=-1)) == (pyodbc.SQL_VARBINARY, 0, 0)
+    assert _sql_input_size(_col('uniqueidentifier', length=None)) == (pyodbc.SQL_WVARCHAR, 36, 0)
+    assert _sql_input_size(_col('datetime2', datetime_precision=7)) == (pyodbc.SQL_TYPE_TIMESTAMP, 0, 7)
+    assert _sql_input_size(_col('time', datetime_precision=3)) == (pyodbc.SQL_SS_TIME2, 16, 3)
+    assert _sql_input_size(_col('xml')) is None